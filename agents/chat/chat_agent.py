@@ -52,7 +52,7 @@ class ChatAgent:
             )
             
             # Get patient history for context
-            patient_history = self.rag_service.search_patient_history(request.phone_number, limit=5)
+            patient_history = await self.rag_service.search_patient_history_async(request.phone_number, limit=5)
             
             message_lower = request.message.lower()
             
@@ -399,7 +399,7 @@ What specific service or doctor would you like to know more about?"""
         })
         
         # Get GPT-4 response with real-time context
-        gpt_response = self.openai_service.get_chat_completion_gpt4(
+        gpt_response = await self.openai_service.get_chat_completion_gpt4_async(
             messages=messages,
             system_prompt=system_prompt,
             temperature=0.7
@@ -426,7 +426,7 @@ What specific service or doctor would you like to know more about?"""
         # Analyze symptoms to provide doctor suggestion while asking for missing info
         recommended_doctors = []
         if symptoms:
-            recommended_doctors = self.rag_service.search_doctors_by_symptoms(symptoms)
+            recommended_doctors = await self.rag_service.search_doctors_by_symptoms_async(symptoms)
         
         if len(missing_info) == 1 and "name" in missing_info[0]:
             if recommended_doctors:
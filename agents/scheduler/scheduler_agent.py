@@ -1,7 +1,7 @@
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date, time, timedelta
-from sqlalchemy.orm import Session
-from models.database import Doctor, Patient, Appointment, TimeSlot
+from sqlalchemy.orm import Session, selectinload
+from models.database import Doctor, Patient, Appointment, TimeSlot, upsert_patient
 from models.schemas import AppointmentCreate, AppointmentBookingRequest, AppointmentBookingResponse
 from services.rag.rag_service import RAGService
 import uuid
@@ -19,10 +19,11 @@ class SchedulerAgent:
         try:
             with self._lock:  # Ensure atomic operations
                 # Find or create patient
-                patient = await self._get_or_create_patient(request.patient_name, request.patient_phone)
+                patient_id = await self._get_or_create_patient(request.patient_name, request.patient_phone)
                 
-                # Analyze symptoms to suggest doctors
-                recommended_doctors = self.rag_service.search_doctors_by_symptoms(request.symptoms)
+                # Analyze symptoms to suggest doctors and assess urgency
+                assessment = self.rag_service.assess_and_recommend(request.symptoms)
+                recommended_doctors = assessment['doctors']
                 
                 if not recommended_doctors:
                     return AppointmentBookingResponse(
@@ -32,7 +33,7 @@ class SchedulerAgent:
                     )
                 
                 # Check urgency level
-                urgency_check = self.rag_service.get_urgent_symptoms_check(request.symptoms)
+                urgency_check = assessment['urgency']
                 
                 if urgency_check['urgency_level'] == 'high':
                     return AppointmentBookingResponse(
@@ -63,7 +64,7 @@ class SchedulerAgent:
                 
                 # Book the appointment
                 appointment = await self._create_appointment(
-                    patient_id=patient.id,
+                    patient_id=patient_id,
                     doctor_id=best_slot['doctor_id'],
                     appointment_date=datetime.fromisoformat(best_slot['date']).date(),
                     appointment_time=datetime.strptime(best_slot['time'], '%H:%M').time(),
@@ -73,7 +74,11 @@ class SchedulerAgent:
                 
                 # Get specialty instructions
                 doctor = self.db.query(Doctor).filter(Doctor.id == best_slot['doctor_id']).first()
-                instructions = self.rag_service.get_specialty_instructions(doctor.specialty)
+                instructions = next(
+                    (specialty['instructions'] for specialty in assessment['specialties']
+                     if specialty['name'] == doctor.specialty),
+                    None
+                ) or self.rag_service.get_specialty_instructions(doctor.specialty)
                 
                 success_message = f"""
 Appointment Confirmed!
@@ -104,20 +109,11 @@ Please arrive 15 minutes early. Bring a valid ID and any previous medical report
                 suggested_doctors=[]
             )
     
-    async def _get_or_create_patient(self, name: str, phone: str) -> Patient:
-        """Find existing patient or create new one"""
-        patient = self.db.query(Patient).filter(Patient.phone == phone).first()
-        
-        if not patient:
-            patient = Patient(
-                name=name,
-                phone=phone
-            )
-            self.db.add(patient)
-            self.db.commit()
-            self.db.refresh(patient)
-        
-        return patient
+    async def _get_or_create_patient(self, name: str, phone: str) -> int:
+        """Find existing patient or create new one, returning the patient id"""
+        patient_id = upsert_patient(self.db, {"name": name, "phone": phone})
+        self.db.commit()
+        return patient_id
     
     async def _find_best_available_slot(
         self, 
@@ -308,7 +304,9 @@ Please arrive 15 minutes early. Bring a valid ID and any previous medical report
             if not patient:
                 return []
             
-            appointments = self.db.query(Appointment).filter(
+            appointments = self.db.query(Appointment).options(
+                selectinload(Appointment.doctor)
+            ).filter(
                 Appointment.patient_id == patient.id
             ).order_by(Appointment.appointment_date.desc()).all()
             
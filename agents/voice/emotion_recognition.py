@@ -1,14 +1,212 @@
 import os
-from typing import Dict, List, Optional, Any
+import re
+import math
+import time
+import asyncio
+import hashlib
+import importlib.util
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple, Any
 import json
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI
+from agents.voice.voice_prompts import get_emotional_support_prompts
 
-# Initialize OpenAI client with error handling
-def get_openai_client():
+# Fully annotated so the module can be compiled with mypyc (`mypyc agents/voice/emotion_recognition.py`);
+# the built extension is imported ahead of this file when present
+
+# One OpenAI client shared by all analyses so connections are reused;
+# set_client() can route it through a caller-owned pooled httpx client
+_openai_client: Optional[AsyncOpenAI] = None
+_http_client: Optional[httpx.AsyncClient] = None
+
+def set_client(client: Optional[httpx.AsyncClient]) -> None:
+    """Use the given httpx client for OpenAI calls (None restores the default)"""
+    global _openai_client, _http_client
+    _http_client = client
+    _openai_client = None
+
+# Initialize OpenAI client with error handling (async so concurrent analyses don't block the event loop)
+def get_openai_client() -> Optional[AsyncOpenAI]:
+    global _openai_client
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
         return None
-    return OpenAI(api_key=api_key)
+    if _openai_client is None:
+        if _http_client is not None:
+            _openai_client = AsyncOpenAI(api_key=api_key, http_client=_http_client)
+        else:
+            _openai_client = AsyncOpenAI(api_key=api_key)
+    return _openai_client
+
+# Repeated utterances reuse an earlier analysis instead of another GPT call
+EMOTION_CACHE_MAX_ENTRIES = 1024
+EMOTION_CACHE_TTL = float(os.getenv("EMOTION_CACHE_TTL", "86400"))
+_emotion_cache: "OrderedDict[bytes, Tuple[float, EmotionAnalysis]]" = OrderedDict()
+
+def _emotion_cache_key(data: "VoiceEmotionData") -> bytes:
+    # Exactly what the prompt reads: the transcript, voice features and the history length
+    raw = "\x00".join((
+        data.transcript,
+        json.dumps(data.voice_features, sort_keys=True, default=str),
+        str(len(data.conversation_history))
+    ))
+    return hashlib.blake2b(raw.encode(), digest_size=16).digest()
+
+def _emotion_cache_get(key: bytes) -> Optional["EmotionAnalysis"]:
+    entry = _emotion_cache.get(key)
+    if entry is None:
+        return None
+    stored_at, analysis = entry
+    if time.monotonic() - stored_at > EMOTION_CACHE_TTL:
+        del _emotion_cache[key]
+        return None
+    _emotion_cache.move_to_end(key)
+    return analysis
+
+def _emotion_cache_put(key: bytes, analysis: "EmotionAnalysis") -> None:
+    _emotion_cache[key] = (time.monotonic(), analysis)
+    _emotion_cache.move_to_end(key)
+    if len(_emotion_cache) > EMOTION_CACHE_MAX_ENTRIES:
+        _emotion_cache.popitem(last=False)
+
+def clear_emotion_cache() -> None:
+    """Drop all cached emotion analyses"""
+    _emotion_cache.clear()
+
+# Optional local classifier (int8 ONNX export from scripts/export_emotion_model.py);
+# confident predictions skip the GPT call entirely
+LOCAL_EMOTION_MODEL_PATH: Optional[str] = os.getenv("LOCAL_EMOTION_MODEL_PATH")
+LOCAL_EMOTION_THRESHOLD = float(os.getenv("LOCAL_EMOTION_THRESHOLD", "0.75"))
+_LOCAL_MODEL_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None for module in ("optimum", "onnxruntime", "transformers")
+)
+_local_classifier: Optional[Tuple[Any, Any]] = None
+_local_classifier_failed: bool = False
+
+# Model labels mapped onto the emotions and tones used by the GPT prompt below
+_LOCAL_LABELS: Dict[str, Tuple[str, str]] = {
+    'fear': ('anxiety', 'calming'),
+    'anger': ('frustration', 'gentle'),
+    'disgust': ('frustration', 'gentle'),
+    'sadness': ('disappointment', 'encouraging'),
+    'surprise': ('confusion', 'gentle'),
+    'joy': ('enthusiasm', 'energetic'),
+    'neutral': ('neutral', 'professional')
+}
+
+def get_local_classifier() -> Optional[Tuple[Any, Any]]:
+    """Load the local emotion model once; None when it isn't configured or can't be loaded"""
+    global _local_classifier, _local_classifier_failed
+    if _local_classifier is not None or _local_classifier_failed:
+        return _local_classifier
+    if not (LOCAL_EMOTION_MODEL_PATH and _LOCAL_MODEL_AVAILABLE and os.path.isdir(LOCAL_EMOTION_MODEL_PATH)):
+        _local_classifier_failed = True
+        return None
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+        from transformers import AutoTokenizer
+        
+        model = ORTModelForSequenceClassification.from_pretrained(
+            LOCAL_EMOTION_MODEL_PATH,
+            file_name="model_quantized.onnx",
+            provider="CPUExecutionProvider"
+        )
+        tokenizer = AutoTokenizer.from_pretrained(LOCAL_EMOTION_MODEL_PATH)
+        _local_classifier = (model, tokenizer)
+        print(f'[Emotion Recognition] Local model loaded from {LOCAL_EMOTION_MODEL_PATH}')
+    except Exception as error:
+        print(f'[Emotion Recognition] Local model unavailable: {error}')
+        _local_classifier_failed = True
+    return _local_classifier
+
+def classify_emotion_locally(transcript: str) -> Optional["EmotionAnalysis"]:
+    """Classify with the local model; None when it's unavailable or below LOCAL_EMOTION_THRESHOLD"""
+    classifier = get_local_classifier()
+    if classifier is None:
+        return None
+    model, tokenizer = classifier
+    
+    inputs = tokenizer(transcript, return_tensors="np", truncation=True)
+    logits = [float(value) for value in model(**inputs).logits[0]]
+    exp = [math.exp(value - max(logits)) for value in logits]
+    probs = [value / sum(exp) for value in exp]
+    best = max(range(len(probs)), key=probs.__getitem__)
+    if probs[best] <= LOCAL_EMOTION_THRESHOLD:
+        return None
+    
+    emotion, tone = _LOCAL_LABELS.get(model.config.id2label[best].lower(), ('neutral', 'professional'))
+    return EmotionAnalysis(
+        primary_emotion=emotion,
+        emotion_intensity=probs[best],
+        confidence=probs[best],
+        emotional_indicators=['Local classifier'],
+        supportive_response=get_emotional_support_prompts().get(emotion, "I'm here to help you with your healthcare needs."),
+        recommended_tone=tone,
+        source='local'
+    )
+
+# Healthcare-specific emotion detection patterns
+EMOTION_KEYWORDS: Dict[str, List[str]] = {
+    'anxiety': ['nervous', 'worried', 'scared', 'unsure', 'afraid', 'concerned', 'anxious'],
+    'frustration': ['frustrated', 'annoying', 'difficult', 'hard', 'stuck', 'upset'],
+    'enthusiasm': ['excited', 'great', 'good', 'happy', 'wonderful', 'excellent'],
+    'confidence': ['definitely', 'sure', 'certain', 'know', 'confident', 'absolutely'],
+    'confusion': ['confused', 'unclear', 'what', 'how', 'why', 'don\'t understand'],
+    'pain': ['hurt', 'pain', 'ache', 'sore', 'uncomfortable', 'suffering'],
+    'stress': ['stressed', 'overwhelmed', 'pressure', 'urgent', 'emergency'],
+    'relief': ['better', 'relieved', 'good', 'fine', 'okay', 'thankful']
+}
+
+# One compiled pass finds every keyword as a whole word ("how" not in "show", "sure" not in "pressure"),
+# allowing simple inflections such as "hurting" or "aches"
+_KEYWORD_SCANNER = re.compile(
+    r"\b(" + "|".join(re.escape(keyword) for keyword in {kw for kws in EMOTION_KEYWORDS.values() for kw in kws}) + r")(?:s|es|ed|ing)?\b"
+)
+
+# Emotions clear enough from keywords alone skip the model calls (set to 0 to disable)
+KEYWORD_FAST_PATH_MIN_HITS = int(os.getenv("KEYWORD_FAST_PATH_MIN_HITS", "2"))
+
+# Everyday words that say little about emotion on their own; the fast path ignores them so such turns still reach GPT
+_GENERIC_KEYWORDS = frozenset({'what', 'how', 'why', 'know', 'sure', 'good', 'fine'})
+
+_KEYWORD_TONES: Dict[str, str] = {
+    'anxiety': 'calming',
+    'frustration': 'gentle',
+    'enthusiasm': 'energetic',
+    'confidence': 'professional',
+    'confusion': 'gentle',
+    'pain': 'compassionate',
+    'stress': 'calming',
+    'relief': 'encouraging'
+}
+
+def _scan_emotion_keywords(transcript: str, ignore: frozenset = frozenset()) -> Dict[str, int]:
+    """Number of distinct keywords of each emotion present in the transcript"""
+    found = {match.group(1) for match in _KEYWORD_SCANNER.finditer(transcript.lower())} - ignore
+    return {
+        emotion: sum(1 for keyword in keywords if keyword in found)
+        for emotion, keywords in EMOTION_KEYWORDS.items()
+    }
+
+def classify_emotion_by_keywords(transcript: str) -> Optional["EmotionAnalysis"]:
+    """Keyword fast path; None unless one emotion clearly wins with KEYWORD_FAST_PATH_MIN_HITS keywords"""
+    if KEYWORD_FAST_PATH_MIN_HITS <= 0:
+        return None
+    ranked = sorted(_scan_emotion_keywords(transcript, _GENERIC_KEYWORDS).items(), key=lambda item: item[1], reverse=True)
+    (emotion, score), runner_up = ranked[0], ranked[1][1]
+    if score < KEYWORD_FAST_PATH_MIN_HITS or score == runner_up:
+        return None
+    
+    return EmotionAnalysis(
+        primary_emotion=emotion,
+        emotion_intensity=min(0.8, score * 0.2 + 0.3),
+        confidence=min(0.9, score * 0.1 + 0.5),
+        emotional_indicators=['Keyword scan'],
+        supportive_response=get_emotional_support_prompts().get(emotion, "I'm here to help you with your healthcare needs."),
+        recommended_tone=_KEYWORD_TONES[emotion],
+        source='scanner'
+    )
 
 class EmotionAnalysis:
     def __init__(
@@ -18,33 +216,43 @@ class EmotionAnalysis:
         confidence: float,
         emotional_indicators: List[str],
         supportive_response: str,
-        recommended_tone: str
-    ):
+        recommended_tone: str,
+        source: str = 'openai'
+    ) -> None:
         self.primary_emotion = primary_emotion
         self.emotion_intensity = max(0.0, min(1.0, emotion_intensity))
         self.confidence = max(0.0, min(1.0, confidence))
         self.emotional_indicators = emotional_indicators
         self.supportive_response = supportive_response
         self.recommended_tone = recommended_tone
+        self.source = source
 
 class VoiceEmotionData:
     def __init__(
         self,
         transcript: str,
-        voice_features: Optional[Dict] = None,
+        voice_features: Optional[Dict[str, Any]] = None,
         conversation_history: Optional[List[Any]] = None
-    ):
+    ) -> None:
         self.transcript = transcript
         self.voice_features = voice_features or {}
         self.conversation_history = conversation_history or []
 
-async def analyze_emotion_from_voice(data: VoiceEmotionData) -> EmotionAnalysis:
-    """Analyze emotion from voice interaction using OpenAI GPT-4"""
-    
-    print(f'[Emotion Recognition] Analyzing voice emotion for: {data.transcript[:50]}')
-    
-    try:
-        system_prompt = """You are an expert emotion recognition system specializing in analyzing speech patterns and linguistic cues to identify emotional states during healthcare conversations.
+# A complete top-level scalar field in the streamed JSON: a closed string, or a number followed by , or }
+_STREAMED_FIELD = re.compile(
+    r'"(primaryEmotion|emotionIntensity|confidence|recommendedTone|supportiveResponse)"\s*:\s*'
+    r'("(?:[^"\\]|\\.)*"|-?\d+(?:\.\d+)?(?=\s*[,}]))'
+)
+
+def _emit_streamed_fields(buffer: str, seen: Set[str], on_field: Callable[[str, Any], None]) -> None:
+    """Report each scalar emotion field once, as soon as it is complete in the partial response"""
+    for match in _STREAMED_FIELD.finditer(buffer):
+        name = match.group(1)
+        if name not in seen:
+            seen.add(name)
+            on_field(name, json.loads(match.group(2)))
+
+EMOTION_SYSTEM_PROMPT = """You are an expert emotion recognition system specializing in analyzing speech patterns and linguistic cues to identify emotional states during healthcare conversations.
 
 EMOTION DETECTION FRAMEWORK:
 Primary emotions to detect:
@@ -87,6 +295,63 @@ TONE RECOMMENDATIONS:
 
 Provide empathetic, context-appropriate emotional support while maintaining healthcare focus."""
 
+def _analysis_from_json(emotion_data: Dict[str, Any]) -> EmotionAnalysis:
+    return EmotionAnalysis(
+        primary_emotion=emotion_data.get('primaryEmotion', 'neutral'),
+        emotion_intensity=emotion_data.get('emotionIntensity', 0.5),
+        confidence=emotion_data.get('confidence', 0.5),
+        emotional_indicators=emotion_data.get('emotionalIndicators', []),
+        supportive_response=emotion_data.get('supportiveResponse', "I'm here to help you with your healthcare needs."),
+        recommended_tone=emotion_data.get('recommendedTone', 'encouraging')
+    )
+
+def _fallback_analysis(transcript: str) -> EmotionAnalysis:
+    """Fallback emotion analysis based on basic text patterns"""
+    fallback_emotion = detect_basic_emotion(transcript)
+    
+    return EmotionAnalysis(
+        primary_emotion=fallback_emotion['emotion'],
+        emotion_intensity=fallback_emotion['intensity'],
+        confidence=0.3,
+        emotional_indicators=['Basic text analysis'],
+        supportive_response="I'm here to help you with your healthcare needs. Let's continue together.",
+        recommended_tone='encouraging',
+        source='keyword'
+    )
+
+async def _analyze_without_gpt(data: VoiceEmotionData, cache_key: bytes) -> Optional[EmotionAnalysis]:
+    """Cached result, keyword fast path or confident local model; None when GPT is needed"""
+    ready = _emotion_cache_get(cache_key) or classify_emotion_by_keywords(data.transcript)
+    if ready is None and _LOCAL_MODEL_AVAILABLE and LOCAL_EMOTION_MODEL_PATH:
+        try:
+            ready = await asyncio.to_thread(classify_emotion_locally, data.transcript)
+        except Exception as error:
+            print(f'[Emotion Recognition] Local model error: {error}')
+    return ready
+
+async def analyze_emotion_from_voice(
+    data: VoiceEmotionData,
+    on_field: Optional[Callable[[str, Any], None]] = None
+) -> EmotionAnalysis:
+    """Analyze emotion from voice interaction using OpenAI GPT-4 (streamed; on_field gets fields as they arrive)"""
+    
+    cache_key = _emotion_cache_key(data)
+    ready = await _analyze_without_gpt(data, cache_key)
+    if ready is not None:
+        if on_field:
+            for name, value in (
+                ('primaryEmotion', ready.primary_emotion),
+                ('emotionIntensity', ready.emotion_intensity),
+                ('confidence', ready.confidence),
+                ('supportiveResponse', ready.supportive_response),
+                ('recommendedTone', ready.recommended_tone)
+            ):
+                on_field(name, value)
+        return ready
+    
+    print(f'[Emotion Recognition] Analyzing voice emotion for: {data.transcript[:50]}')
+    
+    try:
         user_prompt = f"""Analyze the emotional state from this healthcare voice interaction:
 
 TRANSCRIPT: "{data.transcript}"
@@ -103,67 +368,114 @@ Please analyze the emotional state and provide supportive guidance appropriate f
         if not client:
             raise Exception("OpenAI API key not configured")
         
-        response = client.chat.completions.create(
+        stream = await client.chat.completions.create(
             model="gpt-4o",
             messages=[
-                {"role": "system", "content": system_prompt},
+                {"role": "system", "content": EMOTION_SYSTEM_PROMPT},
                 {"role": "user", "content": user_prompt}
             ],
             response_format={"type": "json_object"},
             temperature=0.3,  # Lower temperature for consistent emotion detection
-            max_tokens=400
+            max_tokens=400,
+            stream=True
         )
+        
+        content = ""
+        seen_fields: Set[str] = set()
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                content += delta
+                if on_field:
+                    _emit_streamed_fields(content, seen_fields, on_field)
 
-        emotion_data = json.loads(response.choices[0].message.content or '{}')
+        emotion_data = json.loads(content or '{}')
         
         print(f'[Emotion Recognition] Detected emotion: {emotion_data.get("primaryEmotion")} with intensity: {emotion_data.get("emotionIntensity")}')
         
-        return EmotionAnalysis(
-            primary_emotion=emotion_data.get('primaryEmotion', 'neutral'),
-            emotion_intensity=emotion_data.get('emotionIntensity', 0.5),
-            confidence=emotion_data.get('confidence', 0.5),
-            emotional_indicators=emotion_data.get('emotionalIndicators', []),
-            supportive_response=emotion_data.get('supportiveResponse', "I'm here to help you with your healthcare needs."),
-            recommended_tone=emotion_data.get('recommendedTone', 'encouraging')
-        )
+        analysis = _analysis_from_json(emotion_data)
+        # Only model results are cached; the keyword fallback below is cheap and should be retried
+        _emotion_cache_put(cache_key, analysis)
+        return analysis
         
     except Exception as error:
         print(f'[Emotion Recognition] Error: {error}')
+        return _fallback_analysis(data.transcript)
+
+async def analyze_emotions_batch(transcripts: List[str]) -> List[EmotionAnalysis]:
+    """Analyze several independent transcripts with a single GPT request (results in input order)"""
+    items = [VoiceEmotionData(transcript=transcript) for transcript in transcripts]
+    keys = [_emotion_cache_key(data) for data in items]
+    results: List[Optional[EmotionAnalysis]] = list(
+        await asyncio.gather(*(_analyze_without_gpt(data, key) for data, key in zip(items, keys)))
+    )
+    pending = [i for i, result in enumerate(results) if result is None]
+    if not pending:
+        return [result for result in results if result is not None]
+    
+    print(f'[Emotion Recognition] Analyzing {len(pending)} transcripts in one request')
+    
+    numbered = "\n".join(f'{n}. "{transcripts[i]}"' for n, i in enumerate(pending, 1))
+    user_prompt = f"""Analyze the emotional state of each of these separate healthcare voice interactions:
+
+{numbered}
+
+CONTEXT:
+- Conversation type: Healthcare/Hospital appointment system
+- Voice features: Not available
+- Previous interactions: 0 messages
+- Setting: Medical appointment booking and consultation
+
+Respond with a JSON object {{"results": [...]}} holding one analysis per transcript, in the same order, each in the response format above."""
+    
+    try:
+        client = get_openai_client()
+        if not client:
+            raise Exception("OpenAI API key not configured")
         
-        # Fallback emotion analysis based on basic text patterns
-        fallback_emotion = detect_basic_emotion(data.transcript)
-        
-        return EmotionAnalysis(
-            primary_emotion=fallback_emotion['emotion'],
-            emotion_intensity=fallback_emotion['intensity'],
-            confidence=0.3,
-            emotional_indicators=['Basic text analysis'],
-            supportive_response="I'm here to help you with your healthcare needs. Let's continue together.",
-            recommended_tone='encouraging'
+        response = await client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": EMOTION_SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            response_format={"type": "json_object"},
+            temperature=0.3,
+            max_tokens=400 * len(pending)
         )
+    except Exception as error:
+        print(f'[Emotion Recognition] Error: {error}')
+        for i in pending:
+            results[i] = _fallback_analysis(transcripts[i])
+        return [result for result in results if result is not None]
+    
+    try:
+        batch = json.loads(response.choices[0].message.content or '{}')['results']
+        if len(batch) != len(pending):
+            raise ValueError(f"expected {len(pending)} results, got {len(batch)}")
+        analyses = [_analysis_from_json(emotion_data) for emotion_data in batch]
+    except Exception as error:
+        # A malformed batch reply falls back to one request per transcript
+        print(f'[Emotion Recognition] Batch response unusable ({error}); analyzing individually')
+        analyses = list(await asyncio.gather(*(analyze_emotion_from_voice(items[i]) for i in pending)))
+    else:
+        for i, analysis in zip(pending, analyses):
+            _emotion_cache_put(keys[i], analysis)
+    
+    for i, analysis in zip(pending, analyses):
+        results[i] = analysis
+    return [result for result in results if result is not None]
 
 def detect_basic_emotion(transcript: str) -> Dict[str, Any]:
     """Basic emotion detection using keyword patterns"""
-    text = transcript.lower()
-    
-    # Healthcare-specific emotion detection patterns
-    patterns = {
-        'anxiety': ['nervous', 'worried', 'scared', 'unsure', 'afraid', 'concerned', 'anxious'],
-        'frustration': ['frustrated', 'annoying', 'difficult', 'hard', 'stuck', 'upset'],
-        'enthusiasm': ['excited', 'great', 'good', 'happy', 'wonderful', 'excellent'],
-        'confidence': ['definitely', 'sure', 'certain', 'know', 'confident', 'absolutely'],
-        'confusion': ['confused', 'unclear', 'what', 'how', 'why', 'don\'t understand'],
-        'pain': ['hurt', 'pain', 'ache', 'sore', 'uncomfortable', 'suffering'],
-        'stress': ['stressed', 'overwhelmed', 'pressure', 'urgent', 'emergency'],
-        'relief': ['better', 'relieved', 'good', 'fine', 'okay', 'thankful']
-    }
+    scores = _scan_emotion_keywords(transcript)
     
     max_score = 0
     detected_emotion = 'neutral'
     
-    for emotion, keywords in patterns.items():
-        score = sum(1 for keyword in keywords if keyword in text)
-        
+    for emotion, score in scores.items():
         if score > max_score:
             max_score = score
             detected_emotion = emotion
@@ -171,4 +483,4 @@ def detect_basic_emotion(transcript: str) -> Dict[str, Any]:
     return {
         'emotion': detected_emotion,
         'intensity': min(0.8, max_score * 0.2 + 0.3)
-    }
\ No newline at end of file
+    }
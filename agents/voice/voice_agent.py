@@ -125,7 +125,7 @@ class VoiceAgent:
             
             # Convert response to speech using 3-layer architecture with fallbacks
             try:
-                response_audio = self.voice_service.text_to_speech(
+                response_audio = await self.voice_service.text_to_speech_async(
                     response_text, 
                     method="elevenlabs",
                     voice_id=self._get_voice_settings_for_emotion(emotion_analysis)
@@ -282,7 +282,7 @@ Please arrive 15 minutes early and bring your ID. Is there anything else I can h
         })
         
         # Get GPT-3.5-turbo response (faster and more concise)
-        response = self.openai_service.get_chat_completion_gpt35(
+        response = await self.openai_service.get_chat_completion_gpt35_async(
             messages=messages,
             system_prompt=system_prompt,
             temperature=0.6,
@@ -553,7 +553,7 @@ Please adapt your response tone and approach based on the patient's emotional st
         })
         
         # Get enhanced GPT response
-        response = self.openai_service.get_chat_completion_gpt35(
+        response = await self.openai_service.get_chat_completion_gpt35_async(
             messages=messages,
             system_prompt=system_prompt,
             temperature=0.7,  # Slightly higher for more natural responses
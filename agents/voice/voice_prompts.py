@@ -1,4 +1,12 @@
-from typing import List, Dict, Any
+import os
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
+
+# Whole-prompt cache keyed on hospital, doctors and recent history (set ENABLE_PROMPT_CACHE=False to bypass)
+ENABLE_PROMPT_CACHE = os.getenv("ENABLE_PROMPT_CACHE", "True").lower() == "true"
+PROMPT_CACHE_MAX_ENTRIES = 256
+_prompt_cache: "OrderedDict[tuple, str]" = OrderedDict()
 
 def get_hospital_voice_prompt(
     skill: str = "general", 
@@ -13,12 +21,67 @@ def get_hospital_voice_prompt(
     hospital_info = hospital_info or {}
     available_doctors = available_doctors or []
     
-    base_prompt = f"""You are a professional AI voice assistant for {hospital_info.get('name', 'X Hospital')}. You help patients with appointment bookings, medical inquiries, and general hospital information through natural voice conversations.
+    # Only the conversation history changes between turns; the rest is memoized
+    hospital_key = (
+        hospital_info.get('name', 'X Hospital'),
+        hospital_info.get('phone', '+8801712345000'),
+        hospital_info.get('address', '123 Medical Street, Dhaka, Bangladesh')
+    )
+    doctors_key = tuple(
+        (doctor.get('name', 'Unknown'), doctor.get('specialty', 'General Practice'), doctor.get('available_days', 'Schedule varies'))
+        for doctor in available_doctors[:5]
+    )
+    
+    if not ENABLE_PROMPT_CACHE:
+        return (
+            _voice_prompt_prefix.__wrapped__(hospital_key, doctors_key)
+            + format_conversation_history(conversation_history)
+            + VOICE_PROMPT_SUFFIX
+        )
+    
+    # Only the last 8 messages make it into the prompt, so only they are part of the key
+    history_key = tuple(
+        (msg.get('message_type'), msg.get('message_content', ''))
+        for msg in conversation_history[-8:]
+    )
+    cache_key = (hospital_key, doctors_key, history_key)
+    
+    prompt = _prompt_cache.get(cache_key)
+    if prompt is not None:
+        _prompt_cache.move_to_end(cache_key)
+        return prompt
+    
+    prompt = _voice_prompt_prefix(hospital_key, doctors_key) + format_conversation_history(conversation_history) + VOICE_PROMPT_SUFFIX
+    _prompt_cache[cache_key] = prompt
+    if len(_prompt_cache) > PROMPT_CACHE_MAX_ENTRIES:
+        _prompt_cache.popitem(last=False)
+    return prompt
+
+VOICE_PROMPT_SUFFIX = """
+
+EMERGENCY PROTOCOL:
+If you detect emergency symptoms or urgent language, immediately direct the patient to:
+1. Call emergency services (999) for life-threatening emergencies
+2. Go directly to our Emergency Department
+3. Do not attempt to book regular appointments for emergencies
+
+Remember: This is a voice conversation with a patient seeking healthcare assistance. Be professional, empathetic, and helpful while maintaining appropriate medical boundaries."""
+
+@lru_cache(maxsize=32)
+def _voice_prompt_prefix(hospital_key: Tuple[str, str, str], doctors_key: Tuple[Tuple[str, str, str], ...]) -> str:
+    """Everything in the voice prompt up to the conversation history"""
+    name, phone, address = hospital_key
+    doctors = [
+        {'name': doctor_name, 'specialty': specialty, 'available_days': schedule}
+        for doctor_name, specialty, schedule in doctors_key
+    ]
+    
+    return f"""You are a professional AI voice assistant for {name}. You help patients with appointment bookings, medical inquiries, and general hospital information through natural voice conversations.
 
 HOSPITAL CONTEXT:
-- Hospital: {hospital_info.get('name', 'X Hospital')}
-- Phone: {hospital_info.get('phone', '+8801712345000')}
-- Address: {hospital_info.get('address', '123 Medical Street, Dhaka, Bangladesh')}
+- Hospital: {name}
+- Phone: {phone}
+- Address: {address}
 
 CONVERSATION GUIDELINES:
 1. Maintain professional, compassionate, and clear communication
@@ -32,7 +95,7 @@ VOICE-SPECIFIC APPROACH:
 {get_voice_specific_guidelines()}
 
 AVAILABLE SERVICES:
-{format_available_doctors(available_doctors)}
+{format_available_doctors(doctors)}
 
 RESPONSE STYLE:
 - Speak naturally and conversationally
@@ -42,17 +105,7 @@ RESPONSE STYLE:
 - Keep technical details minimal unless specifically asked
 
 CONVERSATION HISTORY:
-{format_conversation_history(conversation_history)}
-
-EMERGENCY PROTOCOL:
-If you detect emergency symptoms or urgent language, immediately direct the patient to:
-1. Call emergency services (999) for life-threatening emergencies
-2. Go directly to our Emergency Department
-3. Do not attempt to book regular appointments for emergencies
-
-Remember: This is a voice conversation with a patient seeking healthcare assistance. Be professional, empathetic, and helpful while maintaining appropriate medical boundaries."""
-
-    return base_prompt
+"""
 
 def get_voice_specific_guidelines() -> str:
     """Guidelines specific to voice interactions in healthcare"""
@@ -124,8 +177,9 @@ If ANY emergency indicators are detected:
 4. Provide clear emergency instructions
 5. Stay on line until help arrives if needed"""
 
+@lru_cache(maxsize=1)
 def get_emotional_support_prompts() -> Dict[str, str]:
-    """Emotional support responses for different emotional states"""
+    """Emotional support responses for different emotional states (shared; treat as read-only)"""
     return {
         'anxiety': "I can hear that you might be feeling anxious about this. That's completely understandable when dealing with health concerns. Let's take this one step at a time.",
         'frustration': "I understand this situation might be frustrating. I'm here to help make this as smooth as possible for you.",
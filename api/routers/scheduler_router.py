@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager, selectinload
 from typing import List, Optional
 from datetime import date, datetime
 
@@ -41,7 +41,7 @@ async def get_doctor_availability(
     """Get availability for a specific doctor"""
     try:
         rag_service = RAGService(db)
-        available_slots = rag_service.get_doctor_availability(
+        available_slots = await rag_service.get_doctor_availability_async(
             doctor_id=doctor_id,
             start_date=start_date,
             days=days
@@ -88,33 +88,15 @@ async def analyze_symptoms(
     try:
         rag_service = RAGService(db)
         
-        # Get doctor recommendations based on symptoms
-        recommended_doctors = rag_service.search_doctors_by_symptoms(request.symptoms)
-        
-        # Get urgency assessment
-        urgency_check = rag_service.get_urgent_symptoms_check(request.symptoms)
-        
-        # Get specialties
-        recommended_specialties = []
-        seen_specialties = set()
-        
-        for doctor_info in recommended_doctors:
-            specialty_name = doctor_info.get('specialty_info', {}).get('name')
-            if specialty_name and specialty_name not in seen_specialties:
-                specialty = db.query(Specialty).filter(
-                    Specialty.name == specialty_name
-                ).first()
-                if specialty:
-                    recommended_specialties.append(specialty)
-                    seen_specialties.add(specialty_name)
-        
-        # Convert doctors
-        doctors = []
-        for doctor_info in recommended_doctors:
-            from models.database import Doctor as DoctorModel  
-            doctor = db.query(DoctorModel).filter(DoctorModel.id == doctor_info['id']).first()
-            if doctor:
-                doctors.append(doctor)
+        # Urgency, specialties and doctors in one pass
+        assessment = await rag_service.assess_and_recommend_async(request.symptoms)
+        urgency_check = assessment['urgency']
+        
+        # Specialties that have at least one recommended doctor
+        recommended_specialties = [
+            specialty for specialty in assessment['specialties'] if specialty['doctor_ids']
+        ]
+        doctors = assessment['doctors']
         
         return SymptomAnalysisResponse(
             recommended_specialties=recommended_specialties,
@@ -256,6 +238,35 @@ async def get_all_doctors(
             detail=f"Error retrieving doctors: {str(e)}"
         )
 
+@router.get("/doctors/availability")
+async def get_all_doctors_availability(
+    start_date: Optional[date] = Query(None, description="Start date for availability check"),
+    days: int = Query(7, description="Number of days to check"),
+    db: Session = Depends(get_db)
+):
+    """Get availability for every doctor in one request"""
+    try:
+        rag_service = RAGService(db)
+        doctors = await rag_service.get_all_doctors_availability_async(
+            start_date=start_date,
+            days=days
+        )
+        
+        return {
+            "doctors": doctors,
+            "count": len(doctors),
+            "search_period": {
+                "start_date": start_date.isoformat() if start_date else date.today().isoformat(),
+                "days": days
+            }
+        }
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error checking availability: {str(e)}"
+        )
+
 @router.get("/specialties")
 async def get_all_specialties(
     db: Session = Depends(get_db)
@@ -292,7 +303,11 @@ async def get_todays_appointments(
         from models.database import Appointment
         
         today = date.today()
-        appointments = db.query(Appointment).filter(
+        # Patients and doctors batch-loaded with one IN query each
+        appointments = db.query(Appointment).options(
+            selectinload(Appointment.patient),
+            selectinload(Appointment.doctor)
+        ).filter(
             Appointment.appointment_date == today,
             Appointment.status == "scheduled"
         ).all()
@@ -401,7 +416,10 @@ async def get_all_appointments(
     try:
         from models.database import Appointment, Doctor, Patient
         
-        appointments = db.query(Appointment).join(Doctor).join(Patient).order_by(
+        appointments = db.query(Appointment).join(Doctor).join(Patient).options(
+            contains_eager(Appointment.doctor),
+            contains_eager(Appointment.patient)
+        ).order_by(
             Appointment.created_at.desc()
         ).limit(limit).all()
         
@@ -436,8 +454,12 @@ async def get_all_appointments(
         )
 
 @router.get("/appointments/live/recent")
-async def get_live_recent_appointments(db: Session = Depends(get_db)):
+async def get_live_recent_appointments(
+    limit: int = Query(20, ge=1, description="Maximum number of appointments to return (capped at 20)"),
+    db: Session = Depends(get_db)
+):
     """Get live recent appointments for real-time display"""
+    limit = min(limit, 20)
     try:
         from models.database import Appointment, Doctor, Patient
         from datetime import timedelta
@@ -445,11 +467,14 @@ async def get_live_recent_appointments(db: Session = Depends(get_db)):
         # Get appointments from last 24 hours
         yesterday = datetime.now() - timedelta(days=1)
         
-        recent_appointments = db.query(Appointment).join(Doctor).join(Patient).filter(
+        recent_appointments = db.query(Appointment).join(Doctor).join(Patient).options(
+            contains_eager(Appointment.doctor),
+            contains_eager(Appointment.patient)
+        ).filter(
             Appointment.created_at >= yesterday
         ).order_by(
             Appointment.created_at.desc()
-        ).limit(20).all()
+        ).limit(limit).all()
         
         appointments_data = []
         for apt in recent_appointments:
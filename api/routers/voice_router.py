@@ -70,7 +70,7 @@ async def text_to_speech(
     """Convert text to speech (for testing purposes)"""
     try:
         voice_service = VoiceProcessingService()
-        audio_base64 = voice_service.process_voice_output(text, voice_id)
+        audio_base64 = await voice_service.process_voice_output_async(text, voice_id)
         
         return {
             "text": text,
@@ -98,7 +98,7 @@ async def speech_to_text(
         
         # Process through voice service
         voice_service = VoiceProcessingService()
-        transcribed_text = voice_service.process_voice_input(audio_base64)
+        transcribed_text = await voice_service.process_voice_input_async(audio_base64)
         
         return {
             "transcribed_text": transcribed_text,
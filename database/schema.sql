@@ -73,6 +73,17 @@ CREATE TABLE symptom_mappings (
     FOREIGN KEY (specialty_id) REFERENCES specialties(id)
 );
 
+-- Symptom keywords, one lowercased row per mapping keyword (kept in sync by triggers)
+CREATE TABLE symptom_keywords (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mapping_id INTEGER NOT NULL,
+    keyword VARCHAR(100) NOT NULL,
+    specialty_id INTEGER NOT NULL,
+    priority INTEGER DEFAULT 1,
+    FOREIGN KEY (mapping_id) REFERENCES symptom_mappings(id),
+    FOREIGN KEY (specialty_id) REFERENCES specialties(id)
+);
+
 -- Time slots table (for tracking availability)
 CREATE TABLE time_slots (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -108,12 +119,21 @@ CREATE TABLE pre_visit_instructions (
     FOREIGN KEY (specialty_id) REFERENCES specialties(id)
 );
 
+-- Named counters (appointment serial numbers)
+CREATE TABLE counters (
+    name VARCHAR(50) PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_appointments_date_doctor ON appointments(appointment_date, doctor_id);
-CREATE INDEX IF NOT EXISTS idx_appointments_patient ON appointments(patient_id);
-CREATE INDEX IF NOT EXISTS idx_time_slots_doctor_date ON time_slots(doctor_id, slot_date);
+CREATE INDEX IF NOT EXISTS idx_appointments_doctor_date_status ON appointments(doctor_id, appointment_date, status);
+CREATE INDEX IF NOT EXISTS idx_appointments_patient_date ON appointments(patient_id, appointment_date DESC);
+CREATE INDEX IF NOT EXISTS idx_time_slots_doctor_date_blocked ON time_slots(doctor_id, slot_date, is_blocked);
 CREATE INDEX IF NOT EXISTS idx_conversation_patient_time ON conversation_history(patient_phone, timestamp);
 CREATE INDEX IF NOT EXISTS idx_doctor_schedules_doctor ON doctor_schedules(doctor_id, day_of_week);
+CREATE INDEX IF NOT EXISTS idx_symptom_keywords_mapping ON symptom_keywords(mapping_id);
+CREATE INDEX IF NOT EXISTS idx_doctors_specialty_lower ON doctors(lower(specialty));
 
 -- Triggers for automatic timestamp updates
 CREATE TRIGGER update_doctors_timestamp 
@@ -138,4 +158,26 @@ CREATE TRIGGER update_time_slots_timestamp
     AFTER UPDATE ON time_slots
     BEGIN
         UPDATE time_slots SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
-    END;
\ No newline at end of file
+    END;
+
+-- Expand symptom mapping keyword arrays into symptom_keywords
+CREATE TRIGGER symptom_mappings_keywords_insert
+    AFTER INSERT ON symptom_mappings
+    BEGIN
+        INSERT INTO symptom_keywords (mapping_id, keyword, specialty_id, priority)
+        SELECT NEW.id, lower(value), NEW.specialty_id, NEW.priority FROM json_each(NEW.symptom_keywords);
+    END;
+
+CREATE TRIGGER symptom_mappings_keywords_update
+    AFTER UPDATE ON symptom_mappings
+    BEGIN
+        DELETE FROM symptom_keywords WHERE mapping_id = OLD.id;
+        INSERT INTO symptom_keywords (mapping_id, keyword, specialty_id, priority)
+        SELECT NEW.id, lower(value), NEW.specialty_id, NEW.priority FROM json_each(NEW.symptom_keywords);
+    END;
+
+CREATE TRIGGER symptom_mappings_keywords_delete
+    AFTER DELETE ON symptom_mappings
+    BEGIN
+        DELETE FROM symptom_keywords WHERE mapping_id = OLD.id;
+    END;
@@ -10,6 +10,10 @@ from datetime import datetime, date, time, timedelta
 def insert_demo_data():
     """Insert demo data into SQLite database"""
     conn = sqlite3.connect('hospital.db')
+    # Keep temp tables/sorts in memory and mmap the DB file for the batch
+    for pragma in ("journal_mode=WAL", "synchronous=NORMAL", "temp_store=MEMORY",
+                   "cache_size=-65536", "mmap_size=268435456"):
+        conn.execute(f"PRAGMA {pragma}")
     cursor = conn.cursor()
     
     print("Inserting demo data...")
@@ -17,6 +21,9 @@ def insert_demo_data():
     try:
         # Clear existing data
         cursor.execute("DELETE FROM appointments")
+        # Reseed the appointment serial counter from the demo appointments on next booking
+        if cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'counters'").fetchone():
+            cursor.execute("DELETE FROM counters WHERE name = 'appointment_serial'")
         cursor.execute("DELETE FROM patients") 
         cursor.execute("DELETE FROM doctor_schedules")
         cursor.execute("DELETE FROM symptom_mappings")
@@ -106,12 +113,18 @@ def insert_demo_data():
         )
         
         # Insert sample appointments
-        today = date.today()
-        tomorrow = today + timedelta(days=1)
+        today_str = date.today().isoformat()
+        tomorrow_str = (date.today() + timedelta(days=1)).isoformat()
+        
+        # (patient_id, doctor_id, date, time, symptoms, channel)
+        appointment_seed = [
+            (1, 1, tomorrow_str, "18:30", "Chest pain and palpitations", "chat"),
+            (2, 3, today_str, "11:00", "General health checkup", "voice")
+        ]
         
         appointments = [
-            (1, 1, 1, tomorrow.isoformat(), "18:30", 30, "scheduled", "Chest pain and palpitations", "", "XH001", "chat"),
-            (2, 2, 3, today.isoformat(), "11:00", 30, "scheduled", "General health checkup", "", "XH002", "voice")
+            (i, patient_id, doctor_id, dstr, tstr, 30, "scheduled", symptoms, "", f"XH{i:03d}", ch)
+            for i, (patient_id, doctor_id, dstr, tstr, symptoms, ch) in enumerate(appointment_seed, 1)
         ]
         
         cursor.executemany(
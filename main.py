@@ -1,7 +1,9 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 import uvicorn
 import os
+import threading
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -10,7 +12,8 @@ load_dotenv()
 app = FastAPI(
     title="X Hospital AI Assistant",
     description="AI-powered hospital assistant for appointment booking via chat and voice",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware for frontend integration
@@ -40,44 +43,79 @@ app.include_router(system_router.router, prefix="/api/v1/system", tags=["System"
 # Serve static frontend files
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-import os
+from fastapi.middleware.gzip import GZipMiddleware
+from pathlib import Path
+
+app.add_middleware(GZipMiddleware, minimum_size=512)
 
-# Mount static files for CSS, JS, etc.
-if os.path.exists("frontend"):
-    app.mount("/css", StaticFiles(directory="frontend/css"), name="css")
-    app.mount("/js", StaticFiles(directory="frontend/js"), name="js")
+# Resolve page paths once at import; FileResponse still stats each file per request so edits are picked up
+FRONTEND_DIR = Path("frontend").resolve()
+STATIC = {
+    name: Path(p).resolve()
+    for name, p in [
+        ("voice", "frontend/voice-working.html"),
+        ("voice_old", "frontend/voice-realtime.html"),
+        ("test", "test_frontend.html"),
+    ]
+    if Path(p).is_file()
+}
+PAGE_HEADERS = {"Cache-Control": "public,max-age=3600"}
 
-@app.get("/", response_class=FileResponse)
-async def serve_frontend():
-    """Serve the main frontend page"""
-    frontend_path = "frontend/index.html"
-    if os.path.exists(frontend_path):
-        return FileResponse(frontend_path, media_type="text/html")
-    else:
-        return {"message": "Frontend not found. Please ensure frontend/index.html exists."}
+def _static_page(name: str, missing_message: str):
+    """Build a FileResponse from the prefetched path, or 404 if the page is missing"""
+    if name not in STATIC:
+        raise HTTPException(status_code=404, detail=missing_message)
+    return FileResponse(STATIC[name], media_type="text/html", headers=PAGE_HEADERS)
 
 @app.get("/voice")
 async def serve_voice_interface():
     """Serve the working real-time voice interface"""
-    voice_path = "frontend/voice-working.html"
-    if os.path.exists(voice_path):
-        return FileResponse(voice_path, media_type="text/html")
-    else:
-        return {"message": "Voice interface not found. Please ensure frontend/voice-working.html exists."}
+    return _static_page("voice", "Voice interface not found. Please ensure frontend/voice-working.html exists.")
 
 @app.get("/voice-old")
 async def serve_old_voice_interface():
     """Serve the old voice interface for comparison"""
-    voice_path = "frontend/voice-realtime.html"
-    if os.path.exists(voice_path):
-        return FileResponse(voice_path, media_type="text/html")
-    else:
-        return {"message": "Old voice interface not found."}
+    return _static_page("voice_old", "Old voice interface not found.")
 
 @app.get("/test")
 async def test_frontend():
     """Test endpoint to verify static serving"""
-    return FileResponse("test_frontend.html", media_type="text/html")
+    return _static_page("test", "Test page not found. Please ensure test_frontend.html exists.")
+
+@app.on_event("startup")
+async def startup_warm_tts_cache():
+    """Pre-synthesize fixed voice responses once the server starts"""
+    # Pre-synthesize fixed voice responses without delaying startup
+    if os.getenv("ELEVENLABS_API_KEY"):
+        threading.Thread(target=_warm_tts_cache, daemon=True).start()
+
+def _warm_tts_cache():
+    """Fill the TTS cache with the fixed voice responses"""
+    try:
+        from services.elevenlabs.voice_service import ElevenLabsService
+        fetched = ElevenLabsService().warmup()
+        print(f"🔊 TTS cache warmed ({fetched} phrases synthesized)")
+    except Exception as e:
+        print(f"TTS cache warmup failed: {str(e)}")
+
+@app.on_event("shutdown")
+async def shutdown_close_http_session():
+    """Close pooled connections to the voice providers"""
+    from services.elevenlabs.voice_service import close_http_session, close_async_client
+    from services.speechmatics.speechmatics_service import close_speechmatics_client
+    close_http_session()
+    await close_async_client()
+    await close_speechmatics_client()
+
+# Mount the frontend root last so the API routes above take precedence;
+# StaticFiles serves index.html for "/" and handles ETag/If-None-Match/Range
+if FRONTEND_DIR.is_dir():
+    app.mount("/", StaticFiles(directory=FRONTEND_DIR, html=True), name="frontend")
+else:
+    @app.get("/")
+    async def serve_frontend():
+        """Fallback when the frontend directory is missing"""
+        raise HTTPException(status_code=404, detail="Frontend not found. Please ensure frontend/index.html exists.")
 
 if __name__ == "__main__":
     port = int(os.getenv("SERVER_PORT", 8000))
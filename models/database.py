@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Date, Time, Boolean, Text, ForeignKey
+from sqlalchemy import create_engine, text, Index, Column, Integer, String, DateTime, Date, Time, Boolean, Text, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.sql import func
@@ -29,6 +29,10 @@ class Doctor(Base):
     schedules = relationship("DoctorSchedule", back_populates="doctor")
     appointments = relationship("Appointment", back_populates="doctor")
     time_slots = relationship("TimeSlot", back_populates="doctor")
+    
+    __table_args__ = (
+        Index("idx_doctors_specialty_lower", func.lower(specialty)),
+    )
 
 class DoctorSchedule(Base):
     __tablename__ = "doctor_schedules"
@@ -80,6 +84,11 @@ class Appointment(Base):
     # Relationships
     patient = relationship("Patient", back_populates="appointments")
     doctor = relationship("Doctor", back_populates="appointments")
+    
+    __table_args__ = (
+        Index("idx_appointments_doctor_date_status", "doctor_id", "appointment_date", "status"),
+        Index("idx_appointments_patient_date", "patient_id", appointment_date.desc()),
+    )
 
 class Specialty(Base):
     __tablename__ = "specialties"
@@ -105,6 +114,19 @@ class SymptomMapping(Base):
     # Relationships
     specialty = relationship("Specialty", back_populates="symptom_mappings")
 
+class SymptomKeyword(Base):
+    __tablename__ = "symptom_keywords"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    mapping_id = Column(Integer, ForeignKey("symptom_mappings.id"), nullable=False)
+    keyword = Column(String(100), nullable=False)  # lowercased
+    specialty_id = Column(Integer, ForeignKey("specialties.id"), nullable=False)
+    priority = Column(Integer, default=1)
+    
+    __table_args__ = (
+        Index("idx_symptom_keywords_mapping", "mapping_id"),
+    )
+
 class TimeSlot(Base):
     __tablename__ = "time_slots"
     
@@ -119,6 +141,10 @@ class TimeSlot(Base):
     
     # Relationships
     doctor = relationship("Doctor", back_populates="time_slots")
+    
+    __table_args__ = (
+        Index("idx_time_slots_doctor_date_blocked", "doctor_id", "slot_date", "is_blocked"),
+    )
 
 class ConversationHistory(Base):
     __tablename__ = "conversation_history"
@@ -143,6 +169,12 @@ class PreVisitInstruction(Base):
     # Relationships
     specialty = relationship("Specialty", back_populates="pre_visit_instructions_rel")
 
+class Counter(Base):
+    __tablename__ = "counters"
+    
+    name = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
 # Database dependency
 def get_db():
     db = SessionLocal()
@@ -151,6 +183,38 @@ def get_db():
     finally:
         db.close()
 
+# Single-statement patient upsert (requires SQLite >= 3.35 for RETURNING)
+UPSERT_PATIENT_SQL = text(
+    "INSERT INTO patients (name, phone) VALUES (:name, :phone) "
+    "ON CONFLICT(phone) DO UPDATE SET updated_at = CURRENT_TIMESTAMP "
+    "RETURNING id"
+)
+
+def upsert_patient(session, data: dict) -> int:
+    """Insert a patient or touch the existing row with the same phone, returning its id"""
+    return session.execute(UPSERT_PATIENT_SQL, data).scalar()
+
+_MAX_APPOINTMENT_SERIAL = "COALESCE((SELECT MAX(CAST(SUBSTR(serial_number, 3) AS INTEGER)) FROM appointments), 0)"
+
+# Atomic serial increment; the counter is seeded from existing serials (e.g. XH015 -> 16) and
+# catches up whenever appointments were inserted behind its back
+NEXT_APPOINTMENT_SERIAL_SQL = text(
+    f"INSERT INTO counters (name, value) VALUES ('appointment_serial', {_MAX_APPOINTMENT_SERIAL} + 1) "
+    f"ON CONFLICT(name) DO UPDATE SET value = MAX(value, {_MAX_APPOINTMENT_SERIAL}) + 1 "
+    "RETURNING value"
+)
+
+_counter_table_ready = False
+
+def next_appointment_serial(session) -> int:
+    """Reserve the next appointment serial number within the caller's transaction"""
+    global _counter_table_ready
+    if not _counter_table_ready:
+        # Databases created before the counters table existed
+        Counter.__table__.create(bind=session.get_bind(), checkfirst=True)
+        _counter_table_ready = True
+    return session.execute(NEXT_APPOINTMENT_SERIAL_SQL).scalar()
+
 # Create tables
 def create_tables():
     Base.metadata.create_all(bind=engine)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from datetime import datetime, date, time
 from enum import Enum
@@ -38,8 +38,7 @@ class Doctor(DoctorBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Doctor Schedule Models
 class DoctorScheduleBase(BaseModel):
@@ -56,8 +55,7 @@ class DoctorSchedule(DoctorScheduleBase):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Patient Models
 class PatientBase(BaseModel):
@@ -76,8 +74,7 @@ class Patient(PatientBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Appointment Models
 class AppointmentBase(BaseModel):
@@ -105,8 +102,7 @@ class Appointment(AppointmentBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Specialty Models
 class SpecialtyBase(BaseModel):
@@ -120,8 +116,7 @@ class SpecialtyCreate(SpecialtyBase):
 class Specialty(SpecialtyBase):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Symptom Mapping Models
 class SymptomMappingBase(BaseModel):
@@ -136,8 +131,7 @@ class SymptomMapping(SymptomMappingBase):
     id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Conversation History Models
 class ConversationHistoryBase(BaseModel):
@@ -154,8 +148,7 @@ class ConversationHistory(ConversationHistoryBase):
     id: int
     timestamp: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Time Slot Models
 class TimeSlotBase(BaseModel):
@@ -173,8 +166,7 @@ class TimeSlot(TimeSlotBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Chat Request/Response Models
 class ChatRequest(BaseModel):
@@ -0,0 +1,33 @@
+import os
+import sys
+from pathlib import Path
+
+# Allow running as `python scripts/export_emotion_model.py` from the project root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+MODEL_ID = "j-hartmann/emotion-english-distilroberta-base"
+
+def export_emotion_model():
+    """Export the emotion classifier to ONNX and quantize it to dynamic int8 for CPU inference."""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+    
+    project_root = Path(__file__).parent.parent
+    output_path = Path(os.getenv("LOCAL_EMOTION_MODEL_PATH") or project_root / "emotion_model")
+    
+    model = ORTModelForSequenceClassification.from_pretrained(MODEL_ID, export=True, provider="CPUExecutionProvider")
+    model.save_pretrained(output_path)
+    AutoTokenizer.from_pretrained(MODEL_ID).save_pretrained(output_path)
+    
+    quantizer = ORTQuantizer.from_pretrained(output_path)
+    quantizer.quantize(
+        save_dir=output_path,
+        quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    )
+    
+    print(f"Quantized emotion model written to {output_path}")
+    print("Set LOCAL_EMOTION_MODEL_PATH to this directory to enable the local emotion fast path.")
+
+if __name__ == "__main__":
+    export_emotion_model()
@@ -16,8 +16,18 @@ def init_database():
         os.remove(db_path)
         print(f"Removed existing database: {db_path}")
     
+    # Remove stale WAL sidecar files left over from the previous database
+    for suffix in ("-wal", "-shm"):
+        sidecar = db_path.with_name(db_path.name + suffix)
+        if sidecar.exists():
+            os.remove(sidecar)
+    
     # Create new database connection
     conn = sqlite3.connect(db_path)
+    # Keep temp tables/sorts in memory and mmap the DB file for the batch
+    for pragma in ("journal_mode=WAL", "synchronous=NORMAL", "temp_store=MEMORY",
+                   "cache_size=-65536", "mmap_size=268435456"):
+        conn.execute(f"PRAGMA {pragma}")
     cursor = conn.cursor()
     
     try:
@@ -0,0 +1,188 @@
+import os
+import re
+import json
+import time
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+# Keys are sha256 hex digests; anything else in the index is ignored
+_CACHE_KEY = re.compile(r"[0-9a-f]{64}")
+
+def default_tts_cache_dir() -> str:
+    """Per-user cache directory for synthesized audio (not shared /tmp)"""
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "hospital_agent", "tts")
+
+def tts_cache_key(voice_id: str, model_id: str, stability: float, similarity_boost: float, style: float, text: str) -> str:
+    """Build the cache key for a synthesized phrase"""
+    return hashlib.sha256(f"{voice_id}|{model_id}|{stability}|{similarity_boost}|{style}|{text}".encode("utf-8")).hexdigest()
+
+class LRUMediaCache:
+    """Size-bounded LRU cache for synthesized audio, kept in memory and mirrored to disk"""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, max_bytes: int = 64 << 20, dir: Optional[str] = None, ttl: Optional[float] = None):
+        self.max_bytes = max_bytes
+        self.dir = dir or default_tts_cache_dir()
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._index = OrderedDict()   # key -> {"size", "ttl", "created_at"}, oldest first
+        self._memory = {}             # key -> audio bytes loaded in this process
+        self._base64 = {}             # key -> base64 string of the audio
+        self._total_bytes = 0
+        self._disk_enabled = True
+
+        try:
+            os.makedirs(self.dir, mode=0o700, exist_ok=True)
+            self._check_private_dir()
+            self._load_index()
+        except OSError as e:
+            print(f"TTS cache disk disabled: {e}")
+            self._disk_enabled = False
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached audio bytes or None"""
+        with self._lock:
+            meta = self._index.get(key)
+            if meta is None:
+                return None
+
+            if self._is_expired(meta):
+                self._evict(key)
+                return None
+
+            self._index.move_to_end(key)
+            audio = self._memory.get(key)
+            if audio is None:
+                try:
+                    with open(self._path(key), "rb") as audio_file:
+                        audio = audio_file.read()
+                except OSError:
+                    self._evict(key)
+                    return None
+                self._memory[key] = audio
+
+            return audio
+
+    def get_base64(self, key: str) -> Optional[str]:
+        """Return cached audio as base64, encoding it at most once"""
+        encoded = self._base64.get(key)
+        if encoded is not None and key in self._index:
+            return encoded
+
+        audio = self.get(key)
+        if audio is None:
+            return None
+
+        encoded = base64.b64encode(audio).decode("ascii")
+        with self._lock:
+            if key in self._index:
+                self._base64[key] = encoded
+        return encoded
+
+    def put(self, key: str, audio: bytes, ttl: Optional[float] = None):
+        """Store audio bytes, evicting least recently used entries over max_bytes"""
+        if not audio or len(audio) > self.max_bytes or not _CACHE_KEY.fullmatch(key):
+            return
+
+        with self._lock:
+            if key in self._index:
+                self._evict(key)
+
+            if self._disk_enabled:
+                try:
+                    with open(self._path(key), "wb") as audio_file:
+                        audio_file.write(audio)
+                except OSError as e:
+                    print(f"TTS cache write error: {e}")
+
+            self._index[key] = {
+                "size": len(audio),
+                "ttl": ttl if ttl is not None else self.ttl,
+                "created_at": time.time()
+            }
+            self._memory[key] = audio
+            self._total_bytes += len(audio)
+
+            while self._total_bytes > self.max_bytes:
+                oldest_key = next(iter(self._index))
+                self._evict(oldest_key)
+
+            self._save_index()
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            meta = self._index.get(key)
+            return meta is not None and not self._is_expired(meta)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.dir, f"{key}.mp3")
+
+    def _check_private_dir(self):
+        """Refuse a cache directory other users could write to (its files are read back and deleted)"""
+        info = os.stat(self.dir)
+        if info.st_mode & 0o022 or (hasattr(os, "getuid") and info.st_uid != os.getuid()):
+            raise OSError(f"{self.dir} is not a private directory")
+
+    def _is_expired(self, meta: dict) -> bool:
+        return meta["ttl"] is not None and time.time() - meta["created_at"] > meta["ttl"]
+
+    def _evict(self, key: str):
+        meta = self._index.pop(key, None)
+        if meta is None:
+            return
+        self._memory.pop(key, None)
+        self._base64.pop(key, None)
+        self._total_bytes -= meta["size"]
+        if self._disk_enabled:
+            try:
+                os.unlink(self._path(key))
+            except OSError:
+                pass
+
+    def _load_index(self):
+        index_path = os.path.join(self.dir, self.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+
+        try:
+            with open(index_path, "r") as index_file:
+                entries = json.load(index_file)
+        except (OSError, ValueError) as e:
+            print(f"TTS cache index unreadable, starting empty: {e}")
+            return
+
+        # Entries are stored oldest first; drop anything malformed, missing or expired
+        for entry in entries:
+            try:
+                key, meta = entry
+                meta = {"size": int(meta["size"]), "ttl": meta["ttl"], "created_at": float(meta["created_at"])}
+                if meta["ttl"] is not None:
+                    meta["ttl"] = float(meta["ttl"])
+            except (TypeError, ValueError, KeyError):
+                continue
+            if not isinstance(key, str) or not _CACHE_KEY.fullmatch(key) or key in self._index:
+                continue
+            if os.path.exists(self._path(key)) and not self._is_expired(meta):
+                self._index[key] = meta
+                self._total_bytes += meta["size"]
+
+        while self._total_bytes > self.max_bytes:
+            self._evict(next(iter(self._index)))
+
+    def _save_index(self):
+        if not self._disk_enabled:
+            return
+
+        index_path = os.path.join(self.dir, self.INDEX_FILE)
+        temp_path = f"{index_path}.tmp"
+        try:
+            with open(temp_path, "w") as index_file:
+                json.dump(list(self._index.items()), index_file, separators=(",", ":"))
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            print(f"TTS cache index write error: {e}")
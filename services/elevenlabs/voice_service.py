@@ -2,11 +2,98 @@ import os
 import base64
 import io
 from typing import Optional, BinaryIO
+import asyncio
+import importlib.util
+import re
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import httpx
 import json
-from pydub import AudioSegment
-from pydub.playback import play
-import tempfile
+from services.elevenlabs.tts_cache import LRUMediaCache, tts_cache_key
+from services.util.pool import ConnectionPool
+
+# Shared keep-alive session so ElevenLabs/Whisper calls reuse TCP+TLS connections
+# across service instances (the routers build a new service per request)
+_http_session = None
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide pooled HTTP session, creating it on first use"""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        # Retry transient provider errors on the same keep-alive connection
+        retry = Retry(
+            total=3,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["POST", "GET"],
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retry)
+        session.mount("https://api.elevenlabs.io", adapter)
+        session.mount("https://api.openai.com", adapter)
+        _http_session = session
+    return _http_session
+
+# Sentence boundaries used to split long responses into cacheable TTS chunks
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+# Per-provider pools of async clients for the non-blocking pipeline; clients are
+# recycled after ASYNC_CLIENT_MAX_AGE seconds so bursts reuse warm TLS connections
+ASYNC_CLIENT_MAX_AGE = 300
+
+# HTTP/2 when the h2 package is installed (as for the Speechmatics client)
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+async def _connect_async_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=_HTTP2_AVAILABLE,
+        timeout=30,
+        limits=httpx.Limits(max_keepalive_connections=20)
+    )
+
+_elevenlabs_pool = ConnectionPool(_connect_async_client, max_size=8, max_session_duration=ASYNC_CLIENT_MAX_AGE)
+_openai_pool = ConnectionPool(_connect_async_client, max_size=8, max_session_duration=ASYNC_CLIENT_MAX_AGE)
+
+async def close_async_client():
+    """Close the pooled async clients (call on shutdown)"""
+    await _elevenlabs_pool.aclose()
+    await _openai_pool.aclose()
+
+# Fixed responses synthesized into the TTS cache at startup
+WARMUP_PHRASES = [
+    "Hello! Welcome to X Hospital. I'm your AI assistant. How may I help you today?",
+    "Hello! Welcome to X Hospital. How can I help you today?",
+    "This sounds like an emergency. Please hang up immediately and call emergency services at 999, or go to the nearest emergency room. If you are at X Hospital, go directly to our Emergency Department. Do not wait.",
+    "I'm sorry, I couldn't hear you clearly. Could you please repeat that?",
+    "I apologize, but I'm experiencing technical difficulties. Please call our hospital directly at +8801712345000."
+]
+
+# Voice list changes rarely; keep it per API key for an hour
+VOICES_CACHE_TTL = 3600
+_voices_cache = {}  # (api_key, limit) -> (fetched_at, voices)
+
+# Shared TTS cache; repeated phrases (greetings, confirmations) skip the API entirely
+_tts_cache = None
+
+def get_tts_cache() -> LRUMediaCache:
+    """Return the process-wide TTS audio cache, creating it on first use"""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = LRUMediaCache(
+            max_bytes=int(os.getenv("TTS_CACHE_MAX_BYTES", 64 << 20)),
+            dir=os.getenv("TTS_CACHE_DIR") or None
+        )
+    return _tts_cache
+
+def close_http_session():
+    """Close the pooled HTTP session (call on shutdown)"""
+    global _http_session
+    if _http_session is not None:
+        _http_session.close()
+        _http_session = None
 
 class ElevenLabsService:
     def __init__(self):
@@ -20,6 +107,13 @@ class ElevenLabsService:
         
         if not self.api_key:
             raise ValueError("ELEVENLABS_API_KEY environment variable is required")
+        
+        self.session = get_http_session()
+        self.cache = get_tts_cache()
+    
+    def close(self):
+        """Release pooled HTTP connections"""
+        close_http_session()
     
     def text_to_speech(
         self, 
@@ -32,7 +126,48 @@ class ElevenLabsService:
         """Convert text to speech and return audio bytes"""
         
         voice_id = voice_id or self.voice_id
+        cache_key = tts_cache_key(voice_id, self.model_id, stability, similarity_boost, style, text)
+        cached_audio = self.cache.get(cache_key)
+        if cached_audio is not None:
+            return cached_audio
+        
         url = f"{self.base_url}/text-to-speech/{voice_id}"
+        headers, data = self._tts_request(text, stability, similarity_boost, style)
+        
+        try:
+            response = self.session.post(url, json=data, headers=headers, timeout=30)
+            response.raise_for_status()
+            
+            self.cache.put(cache_key, response.content)
+            return response.content
+            
+        except requests.exceptions.RequestException as e:
+            error_msg = str(e)
+            print(f"ElevenLabs TTS error: {error_msg}")
+            
+            # Check for specific error messages
+            if "unusual_activity" in error_msg or "Free Tier usage disabled" in error_msg:
+                print("⚠️  ElevenLabs Free Tier disabled. Continuing with text-only responses.")
+            elif "401" in error_msg:
+                print("⚠️  ElevenLabs API key invalid. Continuing with text-only responses.")
+            
+            # Return empty bytes to continue without audio
+            return b""
+    
+    def warmup(self, phrases: list = WARMUP_PHRASES) -> int:
+        """Synthesize fixed phrases into the cache ahead of the first caller; returns how many were fetched"""
+        
+        fetched = 0
+        for phrase in phrases:
+            cache_key = tts_cache_key(self.voice_id, self.model_id, 0.75, 0.75, 0.0, phrase)
+            if cache_key in self.cache:
+                continue
+            if self.text_to_speech(phrase):
+                fetched += 1
+        return fetched
+    
+    def _tts_request(self, text: str, stability: float, similarity_boost: float, style: float) -> tuple:
+        """Headers and JSON body for a TTS request"""
         
         headers = {
             "Accept": "audio/mpeg",
@@ -51,21 +186,37 @@ class ElevenLabsService:
             }
         }
         
+        return headers, data
+    
+    async def text_to_speech_async(
+        self, 
+        text: str, 
+        voice_id: Optional[str] = None,
+        stability: float = 0.75,
+        similarity_boost: float = 0.75,
+        style: float = 0.0
+    ) -> bytes:
+        """Non-blocking version of text_to_speech using the pooled async clients"""
+        
+        voice_id = voice_id or self.voice_id
+        cache_key = tts_cache_key(voice_id, self.model_id, stability, similarity_boost, style, text)
+        cached_audio = self.cache.get(cache_key)
+        if cached_audio is not None:
+            return cached_audio
+        
+        url = f"{self.base_url}/text-to-speech/{voice_id}"
+        headers, data = self._tts_request(text, stability, similarity_boost, style)
+        
         try:
-            response = requests.post(url, json=data, headers=headers, timeout=30)
+            async with _elevenlabs_pool.connection() as client:
+                response = await client.post(url, json=data, headers=headers)
             response.raise_for_status()
             
+            self.cache.put(cache_key, response.content)
             return response.content
             
-        except requests.exceptions.RequestException as e:
-            error_msg = str(e)
-            print(f"ElevenLabs TTS error: {error_msg}")
-            
-            # Check for specific error messages
-            if "unusual_activity" in error_msg or "Free Tier usage disabled" in error_msg:
-                print("⚠️  ElevenLabs Free Tier disabled. Continuing with text-only responses.")
-            elif "401" in error_msg:
-                print("⚠️  ElevenLabs API key invalid. Continuing with text-only responses.")
+        except httpx.HTTPError as e:
+            print(f"ElevenLabs TTS error: {str(e)}")
             
             # Return empty bytes to continue without audio
             return b""
@@ -77,21 +228,68 @@ class ElevenLabsService:
     ) -> str:
         """Convert text to speech and return base64 encoded audio"""
         
+        # Reuse the cached base64 form for phrases synthesized before
+        cache_key = tts_cache_key(voice_id or self.voice_id, self.model_id, 0.75, 0.75, 0.0, text)
+        cached_base64 = self.cache.get_base64(cache_key)
+        if cached_base64 is not None:
+            return cached_base64
+        
         audio_bytes = self.text_to_speech(text, voice_id)
-        return base64.b64encode(audio_bytes).decode('utf-8')
+        return base64.b64encode(audio_bytes).decode('ascii')
     
-    def get_available_voices(self) -> list:
-        """Get list of available voices"""
+    async def text_to_speech_batched(
+        self, 
+        text: str, 
+        voice_id: Optional[str] = None
+    ) -> bytes:
+        """Synthesize each sentence concurrently (and cached independently), then join the mp3 segments"""
+        
+        sentences = [sentence for sentence in _SENTENCE_SPLIT_RE.split(text.strip()) if sentence]
+        if len(sentences) <= 1:
+            return await self.text_to_speech_async(text, voice_id)
+        
+        results = await asyncio.gather(
+            *(self.text_to_speech_async(sentence, voice_id) for sentence in sentences)
+        )
+        
+        # A failed sentence would leave a gap mid-response; fall back to one request
+        if not all(results):
+            return await self.text_to_speech_async(text, voice_id)
+        
+        # MP3 frames from the same voice/settings concatenate cleanly
+        return b"".join(results)
+    
+    async def text_to_speech_base64_async(
+        self, 
+        text: str, 
+        voice_id: Optional[str] = None
+    ) -> str:
+        """Non-blocking version of text_to_speech_base64"""
+        
+        cache_key = tts_cache_key(voice_id or self.voice_id, self.model_id, 0.75, 0.75, 0.0, text)
+        cached_base64 = self.cache.get_base64(cache_key)
+        if cached_base64 is not None:
+            return cached_base64
+        
+        audio_bytes = await self.text_to_speech_async(text, voice_id)
+        return base64.b64encode(audio_bytes).decode('ascii')
+    
+    def get_available_voices(self, limit: int = 10) -> list:
+        """Get list of available voices (top `limit`, cached for VOICES_CACHE_TTL seconds)"""
+        
+        cached = _voices_cache.get((self.api_key, limit))
+        if cached and time.monotonic() - cached[0] < VOICES_CACHE_TTL:
+            return cached[1]
         
         url = f"{self.base_url}/voices"
         headers = {"xi-api-key": self.api_key}
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.session.get(url, headers=headers, timeout=10)
             response.raise_for_status()
             
-            voices = response.json().get("voices", [])
-            return [
+            voices = response.json().get("voices", [])[:limit]
+            voices = [
                 {
                     "voice_id": voice["voice_id"],
                     "name": voice["name"],
@@ -100,6 +298,8 @@ class ElevenLabsService:
                 }
                 for voice in voices
             ]
+            _voices_cache[(self.api_key, limit)] = (time.monotonic(), voices)
+            return voices
             
         except requests.exceptions.RequestException as e:
             print(f"Error fetching voices: {e}")
@@ -116,25 +316,39 @@ class ElevenLabsService:
     def play_audio_from_bytes(self, audio_bytes: bytes):
         """Play audio from bytes (for testing)"""
         
-        # Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-            temp_file.write(audio_bytes)
-            temp_filename = temp_file.name
-        
         try:
-            # Load and play audio
-            audio = AudioSegment.from_mp3(temp_filename)
+            # Decode in-process; no ffmpeg subprocess
+            import miniaudio
+            import numpy as np
+            import sounddevice as sd
+            
+            decoded = miniaudio.decode(
+                audio_bytes,
+                output_format=miniaudio.SampleFormat.SIGNED16,
+                nchannels=1,
+                sample_rate=44100
+            )
+            sd.play(np.frombuffer(decoded.samples, dtype=np.int16), decoded.sample_rate)
+            sd.wait()
+        except ImportError:
+            # Fall back to pydub, which needs ffmpeg installed
+            from pydub import AudioSegment
+            from pydub.playback import play
+            
+            audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
             play(audio)
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
 
 class WhisperService:
     def __init__(self):
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required for Whisper")
+        
+        self.session = get_http_session()
+    
+    def close(self):
+        """Release pooled HTTP connections"""
+        close_http_session()
     
     def speech_to_text(self, audio_data: bytes, audio_format: str = "mp3") -> str:
         """Convert speech to text using OpenAI Whisper API"""
@@ -145,42 +359,62 @@ class WhisperService:
             "Authorization": f"Bearer {self.api_key}"
         }
         
-        # Create temporary file for audio data
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{audio_format}") as temp_file:
-            temp_file.write(audio_data)
-            temp_filename = temp_file.name
+        files = {
+            "file": (f"audio.{audio_format}", io.BytesIO(audio_data), f"audio/{audio_format}"),
+        }
+        
+        data = {
+            "model": "whisper-1",
+            "language": "en",  # Can be auto-detected by not specifying
+            "response_format": "json"
+        }
         
         try:
-            with open(temp_filename, "rb") as audio_file:
-                files = {
-                    "file": (f"audio.{audio_format}", audio_file, f"audio/{audio_format}"),
-                }
-                
-                data = {
-                    "model": "whisper-1",
-                    "language": "en",  # Can be auto-detected by not specifying
-                    "response_format": "json"
-                }
-                
-                response = requests.post(
-                    url, 
-                    headers=headers, 
-                    files=files, 
-                    data=data,
-                    timeout=30
-                )
-                
-                response.raise_for_status()
-                result = response.json()
-                
-                return result.get("text", "").strip()
-                
+            response = self.session.post(
+                url, 
+                headers=headers, 
+                files=files, 
+                data=data,
+                timeout=30
+            )
+            
+            response.raise_for_status()
+            result = response.json()
+            
+            return result.get("text", "").strip()
+            
         except requests.exceptions.RequestException as e:
             raise Exception(f"Whisper STT error: {str(e)}")
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
+    
+    async def speech_to_text_async(self, audio_data: bytes, audio_format: str = "mp3") -> str:
+        """Non-blocking Whisper transcription; uploads the bytes directly"""
+        
+        url = "https://api.openai.com/v1/audio/transcriptions"
+        
+        headers = {
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        
+        files = {
+            "file": (f"audio.{audio_format}", audio_data, f"audio/{audio_format}"),
+        }
+        
+        data = {
+            "model": "whisper-1",
+            "language": "en",
+            "response_format": "json"
+        }
+        
+        try:
+            async with _openai_pool.connection() as client:
+                response = await client.post(url, headers=headers, files=files, data=data)
+            response.raise_for_status()
+            result = response.json()
+            
+            return result.get("text", "").strip()
+            
+        except httpx.HTTPError as e:
+            raise Exception(f"Whisper STT error: {str(e)}")
     
     def speech_to_text_from_base64(self, audio_base64: str, audio_format: str = "mp3") -> str:
         """Convert base64 encoded audio to text"""
@@ -191,6 +425,16 @@ class WhisperService:
         except Exception as e:
             raise Exception(f"Base64 decode error: {str(e)}")
 
+    async def speech_to_text_from_base64_async(self, audio_base64: str, audio_format: str = "mp3") -> str:
+        """Non-blocking version of speech_to_text_from_base64"""
+        
+        try:
+            audio_bytes = base64.b64decode(audio_base64)
+        except Exception as e:
+            raise Exception(f"Base64 decode error: {str(e)}")
+        
+        return await self.speech_to_text_async(audio_bytes, audio_format)
+
 class VoiceProcessingService:
     """Combined service for voice processing pipeline"""
     
@@ -198,6 +442,10 @@ class VoiceProcessingService:
         self.tts_service = ElevenLabsService()
         self.stt_service = WhisperService()
     
+    def close(self):
+        """Release pooled HTTP connections held by the TTS/STT services"""
+        close_http_session()
+    
     def process_voice_input(self, audio_base64: str, audio_format: str = "mp3") -> str:
         """Process voice input and return transcribed text"""
         return self.stt_service.speech_to_text_from_base64(audio_base64, audio_format)
@@ -226,15 +474,47 @@ class VoiceProcessingService:
         
         return transcribed_text, response_audio_base64
     
+    async def process_voice_input_async(self, audio_base64: str, audio_format: str = "mp3") -> str:
+        """Non-blocking version of process_voice_input"""
+        return await self.stt_service.speech_to_text_from_base64_async(audio_base64, audio_format)
+    
+    async def process_voice_output_async(self, text: str, voice_id: Optional[str] = None) -> str:
+        """Non-blocking version of process_voice_output"""
+        return await self.tts_service.text_to_speech_base64_async(text, voice_id)
+    
+    async def full_voice_pipeline_async(
+        self, 
+        input_audio_base64: str, 
+        text_processor_func,
+        voice_id: Optional[str] = None,
+        audio_format: str = "mp3"
+    ) -> tuple[str, str]:
+        """Complete voice processing pipeline without blocking the event loop"""
+        
+        # Step 1: Convert speech to text
+        transcribed_text = await self.process_voice_input_async(input_audio_base64, audio_format)
+        
+        # Step 2: Process text; sync processors run in a worker thread
+        if asyncio.iscoroutinefunction(text_processor_func):
+            response_text = await text_processor_func(transcribed_text)
+        else:
+            response_text = await asyncio.to_thread(text_processor_func, transcribed_text)
+        
+        # Step 3: Convert response text to speech, sentence by sentence
+        response_audio = await self.tts_service.text_to_speech_batched(response_text, voice_id)
+        response_audio_base64 = base64.b64encode(response_audio).decode('ascii')
+        
+        return transcribed_text, response_audio_base64
+    
     def get_voice_options(self) -> dict:
         """Get available voice options and service status"""
         
-        voices = self.tts_service.get_available_voices()
+        voices = self.tts_service.get_available_voices(limit=10)
         
         return {
             "tts_available": bool(self.tts_service.api_key),
             "stt_available": bool(self.stt_service.api_key),
-            "available_voices": voices[:10],  # Return top 10 voices
+            "available_voices": voices,  # Top 10 voices
             "default_voice_id": self.tts_service.voice_id,
             "supported_audio_formats": ["mp3", "wav", "flac", "m4a"]
         }
\ No newline at end of file
@@ -1,19 +1,221 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
 import os
 from typing import List, Dict, Optional
 from datetime import datetime
+from functools import lru_cache
 import json
+import re
+import time
+import numpy as np
+import tiktoken
+from services.openai.semantic_cache import SemanticCache
+
+# Clients are shared across OpenAIService instances (agents build one per request)
+_OPENAI_CLIENT_SINGLETON = None
+_ASYNC_OPENAI_CLIENT_SINGLETON = None
+
+def _client_options() -> Dict:
+    return {
+        "api_key": os.environ["OPENAI_API_KEY"],
+        "timeout": float(os.getenv("OPENAI_TIMEOUT", "20")),
+        "max_retries": int(os.getenv("OPENAI_MAX_RETRIES", "2"))
+    }
+
+def _client() -> OpenAI:
+    global _OPENAI_CLIENT_SINGLETON
+    if _OPENAI_CLIENT_SINGLETON is None:
+        _OPENAI_CLIENT_SINGLETON = OpenAI(**_client_options())
+    return _OPENAI_CLIENT_SINGLETON
+
+def _async_client() -> AsyncOpenAI:
+    global _ASYNC_OPENAI_CLIENT_SINGLETON
+    if _ASYNC_OPENAI_CLIENT_SINGLETON is None:
+        _ASYNC_OPENAI_CLIENT_SINGLETON = AsyncOpenAI(**_client_options())
+    return _ASYNC_OPENAI_CLIENT_SINGLETON
+
+# Near-duplicate intent queries reuse an earlier extraction instead of another GPT call
+_INTENT_CACHE_SINGLETON = None
+
+def _embed(text: str) -> np.ndarray:
+    response = _client().embeddings.create(model="text-embedding-3-small", input=text)
+    return np.asarray(response.data[0].embedding, dtype=np.float32)
+
+def _intent_cache() -> SemanticCache:
+    global _INTENT_CACHE_SINGLETON
+    if _INTENT_CACHE_SINGLETON is None:
+        _INTENT_CACHE_SINGLETON = SemanticCache(
+            _embed,
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "10000"))
+        )
+    return _INTENT_CACHE_SINGLETON
+
+def _cached_intent_applies(result: Dict, message: str) -> bool:
+    """A cached extraction is only reusable if its extracted values appear in the new message"""
+    msg_lower = message.lower()
+    for field in ("symptoms", "patient_name", "phone"):
+        value = result.get(field)
+        if isinstance(value, str) and value and value.lower() not in msg_lower:
+            return False
+    return True
+
+@lru_cache(maxsize=4)
+def _fmt_time(epoch_second: int, fmt: str = "%A, %B %d, %Y at %I:%M %p") -> str:
+    """Formatted local time, computed at most once per second per format"""
+    return datetime.fromtimestamp(epoch_second).strftime(fmt)
+
+# Token budget for system prompt + history sent to the chat models
+CONTEXT_TOKEN_BUDGET = int(os.getenv("OPENAI_CONTEXT_BUDGET", "6000"))
+_ENC = None
+_ENC_UNAVAILABLE = False
+
+def _encoder():
+    """tiktoken encoder, loaded once; None if the encoding files can't be fetched"""
+    global _ENC, _ENC_UNAVAILABLE
+    if _ENC is None and not _ENC_UNAVAILABLE:
+        try:
+            # The pinned tiktoken predates o200k_base; cl100k_base is close enough for budgeting
+            _ENC = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"tiktoken unavailable, estimating tokens from length: {str(e)}")
+            _ENC_UNAVAILABLE = True
+    return _ENC
+
+@lru_cache(maxsize=4096)
+def _count_tokens(text: str) -> int:
+    enc = _encoder()
+    return len(enc.encode(text)) if enc else len(text) // 4 + 1
+
+def _fit(messages: List[Dict[str, str]], system_prompt: Optional[str], budget: int = CONTEXT_TOKEN_BUDGET) -> List[Dict[str, str]]:
+    """Keep the most recent messages that fit the token budget after the system prompt"""
+    total = _count_tokens(system_prompt) if system_prompt else 0
+    out = []
+    for message in reversed(messages):
+        tokens = _count_tokens(message["content"]) + 4  # per-message framing overhead
+        # Always keep the latest message, even if the prompt alone is over budget
+        if out and total + tokens > budget:
+            break
+        out.append(message)
+        total += tokens
+    return list(reversed(out))
+
+def _doctors_key(available_doctors: List[Dict]) -> tuple:
+    """Hashable snapshot of the doctor fields used in the enhanced prompt"""
+    return tuple(
+        (
+            doc['name'],
+            doc['specialty'],
+            doc.get('phone', 'N/A'),
+            tuple((slot['date'], slot['time']) for slot in (doc.get('next_available_slots') or [])[:3]),
+            doc.get('total_available_slots')
+        )
+        for doc in available_doctors
+    )
+
+# Patient history entries included in chat prompts (search_patient_history returns newest first)
+PATIENT_HISTORY_LIMIT = 5
+
+@lru_cache(maxsize=256)
+def _serialize_history(history_key: tuple) -> str:
+    return json.dumps([dict(item) for item in history_key], separators=(",", ":"))
+
+def _history_context(patient_history: Optional[List[Dict]]) -> str:
+    """PATIENT HISTORY block for the most recent entries, or "" when there is none"""
+    if not patient_history:
+        return ""
+    
+    recent = patient_history[:PATIENT_HISTORY_LIMIT]
+    try:
+        serialized = _serialize_history(tuple(tuple(item.items()) for item in recent))
+    except TypeError:
+        # Unhashable values (nested lists/dicts) - serialize without caching
+        serialized = json.dumps(recent, separators=(",", ":"))
+    
+    return f"""
+PATIENT HISTORY:
+{serialized}
+"""
+
+@lru_cache(maxsize=128)
+def _build_doctor_block(doctors_key: tuple) -> str:
+    """Format doctors with real-time availability"""
+    doctors_info = ""
+    for name, specialty, phone, slots, total_available_slots in doctors_key:
+        doctors_info += f"\n- Dr. {name} ({specialty})\n"
+        doctors_info += f"  Phone: {phone}\n"
+        if slots:
+            doctors_info += f"  Next available slots:\n"
+            for i, (slot_date, slot_time) in enumerate(slots, 1):
+                slot_date = datetime.fromisoformat(slot_date).strftime('%A, %B %d')
+                doctors_info += f"    {i}. {slot_date} at {slot_time}\n"
+            doctors_info += f"  Total available slots this week: {total_available_slots}\n"
+        else:
+            doctors_info += f"  No availability in next 7 days\n"
+    return doctors_info
+
+# Static part of the enhanced chat prompt; kept short since every chat turn pays for it
+_STATIC_PROMPT_TEMPLATE = """You are the chat receptionist for {hospital_name} with real-time database access and full memory of this conversation.
+
+HOSPITAL PHONE: {hospital_phone}
+
+RULES:
+- Answer the user's question completely first; only then offer booking. Not every medical question is a booking request.
+- Use the conversation history: never ask for the patient's name twice, never restart when context exists, keep the doctor/day/booking stage already being discussed.
+- Use the patient's name once given. Remember symptoms, preferred doctor and time preferences.
+- For services we don't offer, say what we can do and explain the referral process.
+- Use the live availability below; never invent slots.
+
+HOW TO RESPOND:
+- "Do you have X?" / "Tell me about Y" -> full answer about our doctors/services, then optionally offer booking. E.g. heart surgery: Dr. Rahman (Cardiology) evaluates and refers to cardiac surgery centers.
+- "I need an appointment" -> ask symptoms or doctor preference, recommend a doctor, show availability.
+- "What about Friday?" -> check Friday for the SAME doctor, addressing the patient by name.
+
+SYMPTOM-SPECIALTY MAPPING:
+- Chest pain, heart -> Cardiology (Dr. Rahman)
+- Stomach, digestion -> Gastroenterology (Dr. Ayesha)
+- Fever, general health -> General Medicine (Dr. Karim)"""
+
+@lru_cache(maxsize=8)
+def _build_enhanced_prompt_prefix(hospital_name: str, hospital_phone: str) -> str:
+    """Byte-stable leading block of the enhanced chat prompt (rules, response patterns, mapping)"""
+    return _STATIC_PROMPT_TEMPLATE.format(hospital_name=hospital_name, hospital_phone=hospital_phone)
+
+def _keyword_re(keywords: List[str]) -> "re.Pattern":
+    """One compiled alternation matching any keyword as a substring"""
+    return re.compile("|".join(re.escape(keyword) for keyword in keywords))
+
+# Keyword scans for the extract_appointment_intent fallbacks (substring matches on lowercased text)
+_BOOKING_HINT_RE = _keyword_re(["book", "appointment", "doctor"])
+_DOCTOR_RE = _keyword_re(["dr", "doctor", "rahman", "ayesha", "karim"])
+_APPT_RE = _keyword_re(["book", "appointment", "schedule", "meet", "see", "visit"])
+_INFO_RE = _keyword_re(["tell me", "about", "information", "hospital", "cancer", "services", "what is"])
+_AVAIL_RE = _keyword_re(["available", "free", "time", "when", "schedule", "friday", "monday"])
+_TIME_RE = _keyword_re(["friday", "monday", "tuesday", "wednesday", "thursday", "saturday", "sunday", "what about", "different time"])
+_SPECIALTY_TABLE = {
+    'cancer': 'oncology', 'oncolog': 'oncology',
+    'heart': 'cardiology', 'cardio': 'cardiology',
+    'skin': 'dermatology', 'derma': 'dermatology'
+}
+
+def _detect_specialty(msg_lower: str) -> Optional[str]:
+    """First specialty whose keyword appears in the message"""
+    for keyword, specialty in _SPECIALTY_TABLE.items():
+        if keyword in msg_lower:
+            return specialty
+    return None
 
 class OpenAIService:
     def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self._has_key = bool(os.getenv("OPENAI_API_KEY"))
+        self.client = _client() if self._has_key else None
+        self.async_client = _async_client() if self._has_key else None
         self.gpt4_model = os.getenv("OPENAI_GPT4_MODEL", "gpt-4o")
         self.gpt35_model = os.getenv("OPENAI_GPT35_MODEL", "gpt-3.5-turbo")
         self.temperature = float(os.getenv("OPENAI_TEMPERATURE", "0.7"))
         self.max_tokens = int(os.getenv("OPENAI_MAX_TOKENS", "2000"))
         
         # Check if API key is available
-        if not os.getenv("OPENAI_API_KEY"):
+        if not self._has_key:
             print("Warning: OPENAI_API_KEY not found. OpenAI features will not work.")
     
     def get_chat_completion_gpt4(
@@ -26,7 +228,7 @@ class OpenAIService:
         """Get completion using GPT-4 for complex chat interactions"""
         try:
             # Check if API key is available
-            if not os.getenv("OPENAI_API_KEY"):
+            if not self._has_key:
                 return "I apologize, but the OpenAI service is not configured. Please contact the hospital directly at +8801712345000."
             
             formatted_messages = []
@@ -34,7 +236,7 @@ class OpenAIService:
             if system_prompt:
                 formatted_messages.append({"role": "system", "content": system_prompt})
             
-            formatted_messages.extend(messages)
+            formatted_messages.extend(_fit(messages, system_prompt))
             
             response = self.client.chat.completions.create(
                 model=self.gpt4_model,
@@ -59,7 +261,7 @@ class OpenAIService:
         """Get completion using GPT-3.5 for voice interactions"""
         try:
             # Check if API key is available
-            if not os.getenv("OPENAI_API_KEY"):
+            if not self._has_key:
                 return "I apologize, but the OpenAI service is not configured. Please call the hospital directly at +8801712345000."
             
             formatted_messages = []
@@ -67,7 +269,7 @@ class OpenAIService:
             if system_prompt:
                 formatted_messages.append({"role": "system", "content": system_prompt})
             
-            formatted_messages.extend(messages)
+            formatted_messages.extend(_fit(messages, system_prompt))
             
             response = self.client.chat.completions.create(
                 model=self.gpt35_model,
@@ -82,6 +284,72 @@ class OpenAIService:
             print(f"OpenAI GPT-3.5 Error: {str(e)}")
             return f"I apologize, but I'm having technical issues. Please call the hospital directly at +8801712345000."
     
+    async def get_chat_completion_gpt4_async(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Non-blocking GPT-4 completion for use inside async handlers"""
+        try:
+            # Check if API key is available
+            if not self._has_key:
+                return "I apologize, but the OpenAI service is not configured. Please contact the hospital directly at +8801712345000."
+            
+            formatted_messages = []
+            
+            if system_prompt:
+                formatted_messages.append({"role": "system", "content": system_prompt})
+            
+            formatted_messages.extend(_fit(messages, system_prompt))
+            
+            response = await self.async_client.chat.completions.create(
+                model=self.gpt4_model,
+                messages=formatted_messages,
+                temperature=temperature or self.temperature,
+                max_tokens=max_tokens or self.max_tokens
+            )
+            
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            print(f"OpenAI GPT-4 Error: {str(e)}")
+            return f"I apologize, but I'm experiencing technical difficulties. Please try again or contact the hospital directly at +8801712345000."
+    
+    async def get_chat_completion_gpt35_async(
+        self,
+        messages: List[Dict[str, str]],
+        system_prompt: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Non-blocking GPT-3.5 completion for use inside async handlers"""
+        try:
+            # Check if API key is available
+            if not self._has_key:
+                return "I apologize, but the OpenAI service is not configured. Please call the hospital directly at +8801712345000."
+            
+            formatted_messages = []
+            
+            if system_prompt:
+                formatted_messages.append({"role": "system", "content": system_prompt})
+            
+            formatted_messages.extend(_fit(messages, system_prompt))
+            
+            response = await self.async_client.chat.completions.create(
+                model=self.gpt35_model,
+                messages=formatted_messages,
+                temperature=temperature or self.temperature,
+                max_tokens=max_tokens or self.max_tokens
+            )
+            
+            return response.choices[0].message.content.strip()
+            
+        except Exception as e:
+            print(f"OpenAI GPT-3.5 Error: {str(e)}")
+            return f"I apologize, but I'm having technical issues. Please call the hospital directly at +8801712345000."
+    
     def create_chat_system_prompt(
         self,
         hospital_info: Dict,
@@ -90,19 +358,14 @@ class OpenAIService:
     ) -> str:
         """Create system prompt for chat agent"""
         
-        current_time = datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
+        current_time = _fmt_time(int(time.time()))
         
         doctors_info = "\n".join([
             f"- Dr. {doc['name']} ({doc['specialty']}) - Phone: {doc.get('phone', 'N/A')}"
             for doc in available_doctors
         ])
         
-        history_context = ""
-        if patient_history:
-            history_context = f"""
-PATIENT HISTORY:
-{json.dumps(patient_history, indent=2)}
-"""
+        history_context = _history_context(patient_history)
         
         return f"""You are an AI assistant for {hospital_info.get('name', 'X Hospital')}, helping patients book appointments via chat (WhatsApp, Messenger, Website).
 
@@ -167,111 +430,25 @@ Remember: You represent {hospital_info.get('name', 'X Hospital')} - maintain pro
     ) -> str:
         """Create enhanced system prompt with real-time availability data"""
         
-        current_time = datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
+        current_time = _fmt_time(int(time.time()))
         
-        # Format doctors with real-time availability
-        doctors_info = ""
-        for doc in available_doctors:
-            doctors_info += f"\n- Dr. {doc['name']} ({doc['specialty']})\n"
-            doctors_info += f"  Phone: {doc.get('phone', 'N/A')}\n"
-            if doc.get('next_available_slots'):
-                doctors_info += f"  Next available slots:\n"
-                for i, slot in enumerate(doc['next_available_slots'][:3], 1):
-                    slot_date = datetime.fromisoformat(slot['date']).strftime('%A, %B %d')
-                    doctors_info += f"    {i}. {slot_date} at {slot['time']}\n"
-                doctors_info += f"  Total available slots this week: {doc['total_available_slots']}\n"
-            else:
-                doctors_info += f"  No availability in next 7 days\n"
+        # Static rules first, then doctors, then the per-turn time/history, so
+        # consecutive calls share the longest possible prefix (OpenAI prompt caching)
+        prefix = _build_enhanced_prompt_prefix(
+            hospital_info.get('name', 'X Hospital'),
+            hospital_info.get('phone', '+8801712345000')
+        )
+        doctors_block = _build_doctor_block(_doctors_key(available_doctors))
         
-        history_context = ""
-        if patient_history:
-            history_context = f"""
-PATIENT HISTORY:
-{json.dumps(patient_history, indent=2)}
-"""
+        history_context = _history_context(patient_history)
         
-        return f"""You are an AI assistant for {hospital_info.get('name', 'X Hospital')}, helping patients via chat with PERFECT CONVERSATION MEMORY.
-
-CURRENT TIME: {current_time}
-HOSPITAL PHONE: {hospital_info.get('phone', '+8801712345000')}
-
-CRITICAL CONVERSATION RULES:
-🎯 ANSWER QUESTIONS FIRST: If user asks "do you have [X]?" or "tell me about [Y]" - ANSWER THE QUESTION completely before suggesting booking
-🧠 MAINTAIN PERFECT MEMORY: Remember everything from the conversation history
-📝 USE PATIENT NAMES: If patient gave their name previously, always use it
-🔄 CONTEXT AWARENESS: Remember what doctor/appointment we were discussing
-💬 CONVERSATIONAL FLOW: Each response should build on previous messages
-🚫 NEVER ASSUME BOOKING: Don't assume every medical question means they want to book immediately
-
-YOUR ROLE:
-- Hospital receptionist with REAL-TIME database access AND perfect conversation memory
-- Remember names, doctors discussed, appointment preferences from conversation history
-- Answer questions about hospital/services thoroughly before suggesting booking
-- Help with appointments using live database information
-- Maintain natural conversation flow - never repeat requests for information already provided
+        return f"""{prefix}
 
 REAL-TIME AVAILABLE DOCTORS (LIVE DATABASE):
-{doctors_info}
-
-CONVERSATION MEMORY GUIDELINES:
-1. NAME MEMORY: If patient said "my name is [X]" earlier, ALWAYS remember and use their name
-2. DOCTOR CONTEXT: If discussing Dr. Karim's availability, remember this context for follow-ups
-3. APPOINTMENT FLOW: If showing Tuesday slots and patient asks "what about Friday?", check Friday for SAME doctor
-4. BOOKING PROGRESS: Remember if we're in middle of booking process vs. general inquiry
-5. PREFERENCES: Remember patient symptoms, preferred doctors, time preferences
-
-CONVERSATION SCENARIOS:
-
-SCENARIO 1 - Information Request:
-User: "Do you have heart ring surgeons?"
-Response: "We have Dr. Rahman, our cardiology specialist who handles heart conditions. For specialized cardiac surgery, he can evaluate your condition and provide referrals to cardiac surgery centers when needed. Would you like to know more about his services?"
+{doctors_block}
 
-SCENARIO 2 - Hospital Information:
-User: "Tell me about your hospital and cancer doctors"
-Response: Provide comprehensive hospital info, explain services, then mention booking option
-
-SCENARIO 3 - Booking Flow:
-User: "I need appointment" → Ask symptoms/doctor preference
-User: "For fever" → Recommend Dr. Karim, show availability 
-User: "My name is John" → Remember name, continue with John
-User: "What about Friday?" → Check Dr. Karim Friday availability for John (NOT ask name again!)
-
-SCENARIO 4 - Specialized Services:
-User: "Do you have [specialized service]?"
-Response: Answer what we have, explain our capabilities, mention referral options if needed, THEN ask if they want to book
-
-IMPORTANT RULES:
-❌ NEVER ask for name twice in same conversation
-❌ NEVER start over if context exists
-❌ NEVER give generic responses when context is clear
-❌ NEVER assume every medical question is a booking request
-❌ NEVER ask for booking details when user is asking for information
-✅ ALWAYS answer the user's question first
-✅ ALWAYS use patient name once provided
-✅ ALWAYS remember which doctor we're discussing
-✅ ALWAYS maintain conversation continuity
-✅ ALWAYS explain our services before suggesting appointments
-
-RESPONSE PATTERNS:
-- Information requests ("do you have X?", "tell me about Y"): Provide COMPLETE answer first, then optionally mention booking
-- Service inquiries: Explain what we offer, limitations, referral process
-- Follow-up questions: Use conversation context, don't restart
-- Time preferences: "Let me check [same doctor] for [requested day], [patient name]"
-- Booking continuation: Build on previous messages naturally
-- Specialized services: Be honest about our capabilities, explain referral process
-
-EXAMPLES:
-❌ BAD: User asks "Do you have heart surgeons?" → "Please provide your name to book"
-✅ GOOD: User asks "Do you have heart surgeons?" → "We have Dr. Rahman (Cardiology) who can evaluate heart conditions and refer to specialized cardiac surgery centers when needed. Would you like to consult with him?"
-
-SYMPTOM-SPECIALTY MAPPING:
-- Chest pain, heart → Cardiology (Dr. Rahman)
-- Stomach, digestion → Gastroenterology (Dr. Ayesha)
-- Fever, general health → General Medicine (Dr. Karim)
-
-{history_context}
-
-REMEMBER: You are having a CONTINUOUS CONVERSATION, not separate interactions. Use the conversation history to provide intelligent, contextual responses that build on what was already discussed!"""
+CURRENT TIME: {current_time}
+{history_context}"""
 
     def create_voice_system_prompt(
         self,
@@ -280,7 +457,7 @@ REMEMBER: You are having a CONTINUOUS CONVERSATION, not separate interactions. U
     ) -> str:
         """Create system prompt for voice agent (more concise for speech)"""
         
-        current_time = datetime.now().strftime("%I:%M %p")
+        current_time = _fmt_time(int(time.time()), "%I:%M %p")
         
         doctors_list = ", ".join([
             f"Dr. {doc['name']} for {doc['specialty']}"
@@ -351,19 +528,13 @@ Rules:
 - Return only valid JSON, no other text"""
 
         try:
-            if not os.getenv("OPENAI_API_KEY"):
+            if not self._has_key:
                 # Fallback simple extraction without AI
                 msg_lower = message.lower()
-                specialty = None
-                if "cancer" in msg_lower or "oncolog" in msg_lower:
-                    specialty = "oncology"
-                elif "heart" in msg_lower or "cardio" in msg_lower:
-                    specialty = "cardiology"
-                elif "skin" in msg_lower or "derma" in msg_lower:
-                    specialty = "dermatology"
+                specialty = _detect_specialty(msg_lower)
                 
                 return {
-                    "intent": "booking" if "book" in msg_lower or "appointment" in msg_lower or "doctor" in msg_lower else "inquiry",
+                    "intent": "booking" if _BOOKING_HINT_RE.search(msg_lower) else "inquiry",
                     "symptoms": message,
                     "urgency": "low",
                     "preferred_time": None,
@@ -372,40 +543,44 @@ Rules:
                     "specialty_preference": specialty
                 }
             
+            cache = _intent_cache()
+            cached_result, query_vector = cache.lookup(message)
+            if cached_result is not None and _cached_intent_applies(cached_result, message):
+                return dict(cached_result)
+            
+            # JSON mode guarantees parseable output; temperature 0 keeps results deterministic
             response = self.client.chat.completions.create(
                 model=self.gpt35_model,
                 messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=200
+                temperature=0,
+                max_tokens=150,
+                response_format={"type": "json_object"}
             )
             
-            result = response.choices[0].message.content.strip()
-            return json.loads(result)
+            result = json.loads(response.choices[0].message.content.strip())
+            cache.store(query_vector, result)
+            return dict(result)
             
         except Exception as e:
             # Fallback simple extraction
             # Enhanced fallback extraction with better context awareness
             msg_lower = message.lower()
+            specialty = _detect_specialty(msg_lower)
             
             # Detect doctor name requests
-            doctor_names = ["dr", "doctor", "rahman", "ayesha", "karim"]
-            specific_doctor = any(name in msg_lower for name in doctor_names)
+            specific_doctor = bool(_DOCTOR_RE.search(msg_lower))
             
             # Detect appointment intent
-            appointment_keywords = ["book", "appointment", "schedule", "meet", "see", "visit"]
-            is_booking = any(keyword in msg_lower for keyword in appointment_keywords)
+            is_booking = bool(_APPT_RE.search(msg_lower))
             
             # Detect information requests (should NOT be treated as booking)
-            info_keywords = ["tell me", "about", "information", "hospital", "cancer", "services", "what is"]
-            is_info_request = any(keyword in msg_lower for keyword in info_keywords)
+            is_info_request = bool(_INFO_RE.search(msg_lower))
             
             # Detect availability inquiry
-            availability_keywords = ["available", "free", "time", "when", "schedule", "friday", "monday"]
-            is_availability = any(keyword in msg_lower for keyword in availability_keywords)
+            is_availability = bool(_AVAIL_RE.search(msg_lower))
             
             # Detect time/day preferences (continuation of booking)
-            time_preferences = ["friday", "monday", "tuesday", "wednesday", "thursday", "saturday", "sunday", "what about", "different time"]
-            is_time_preference = any(keyword in msg_lower for keyword in time_preferences)
+            is_time_preference = bool(_TIME_RE.search(msg_lower))
             
             # Determine intent with better logic
             if is_info_request:
@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Tuple
+import numpy as np
+
+class SemanticCache:
+    """Embedding-keyed response cache: near-duplicate queries (cosine >= threshold) reuse a stored response"""
+
+    def __init__(
+        self,
+        embed: Callable[[str], Optional[np.ndarray]],
+        threshold: float = 0.95,
+        max_entries: int = 10000
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._matrix = None            # (max_entries, dim) float32, rows L2-normalized
+        self._size = 0                 # rows [0, _size) are in use
+        self._responses = OrderedDict()  # row -> response, least recently used first
+
+    def lookup(self, text: str) -> Tuple[Optional[Any], Optional[np.ndarray]]:
+        """Return (cached response or None, query embedding) so a miss can be stored without re-embedding"""
+        vector = self._normalized_embedding(text)
+        if vector is None:
+            return None, None
+
+        with self._lock:
+            if self._size == 0:
+                return None, vector
+
+            sims = self._matrix[:self._size] @ vector
+            row = int(np.argmax(sims))
+            if sims[row] < self.threshold:
+                return None, vector
+
+            self._responses.move_to_end(row)
+            return self._responses[row], vector
+
+    def store(self, vector: Optional[np.ndarray], response: Any):
+        """Insert a response under an embedding from lookup(), evicting the LRU entry when full"""
+        if vector is None:
+            return
+
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+
+            if self._size < self.max_entries:
+                row = self._size
+                self._size += 1
+            else:
+                row, _ = self._responses.popitem(last=False)
+
+            self._matrix[row] = vector
+            self._responses[row] = response
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _normalized_embedding(self, text: str) -> Optional[np.ndarray]:
+        try:
+            vector = self.embed(text)
+        except Exception as e:
+            print(f"Semantic cache embedding error: {str(e)}")
+            return None
+
+        if vector is None:
+            return None
+
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
@@ -1,74 +1,274 @@
 import json
+import copy
+import asyncio
+import string
+import time as time_module
+from collections import OrderedDict
 from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
-from models.database import Doctor, Specialty, SymptomMapping, TimeSlot, Appointment, PreVisitInstruction
-from datetime import datetime, date, time, timedelta
+from sqlalchemy import func, inspect, text
+from sqlalchemy.orm import Session, selectinload
+from models.database import Doctor, Specialty, SymptomMapping, TimeSlot, Appointment, PreVisitInstruction, next_appointment_serial
+from datetime import date, time, timedelta
 import re
 
+# Preprocessed symptom mappings per database: [(specialty_id, lowercased keywords, priority)]
+_symptom_index_cache = {}
+
+def _load_symptom_index(db: Session) -> List[tuple]:
+    """Parse and lowercase symptom keywords once per database"""
+    cache_key = str(db.get_bind().url)
+    index = _symptom_index_cache.get(cache_key)
+    if index is None:
+        index = [
+            (specialty_id, tuple(keyword.lower() for keyword in json.loads(keywords)), priority)
+            for specialty_id, keywords, priority in db.query(
+                SymptomMapping.specialty_id, SymptomMapping.symptom_keywords, SymptomMapping.priority
+            )
+        ]
+        _symptom_index_cache[cache_key] = index
+    return index
+
+def invalidate_symptom_index():
+    """Drop the cached symptom index after symptom mappings change"""
+    _symptom_index_cache.clear()
+
+# Rank specialties by summed priority of keywords contained in the (lowercased) symptoms;
+# ties keep the order of the first matching mapping, as the in-Python scan did
+SCORE_SPECIALTIES_SQL = text(
+    "SELECT specialty_id, SUM(priority) AS score FROM symptom_keywords "
+    "WHERE instr(:symptoms, keyword) > 0 "
+    "GROUP BY specialty_id ORDER BY score DESC, MIN(mapping_id) LIMIT 3"
+)
+
+_KEYWORD_ROWS_EXIST_SQL = text("SELECT EXISTS(SELECT 1 FROM symptom_keywords)")
+
+_keyword_table_ready = set()  # database URLs whose symptom_keywords table is populated
+
+def _has_keyword_table(db: Session) -> bool:
+    # create_all makes an empty symptom_keywords without the schema.sql triggers,
+    # so only trust the table once it holds rows
+    cache_key = str(db.get_bind().url)
+    if cache_key in _keyword_table_ready:
+        return True
+    if not inspect(db.get_bind()).has_table("symptom_keywords"):
+        return False
+    if not db.execute(_KEYWORD_ROWS_EXIST_SQL).scalar():
+        return False
+    _keyword_table_ready.add(cache_key)
+    return True
+
+# Doctor/specialty catalog lookups change rarely; keep recent results for a few minutes
+CATALOG_CACHE_TTL = 300
+CATALOG_CACHE_MAX_ENTRIES = 256
+_catalog_cache = OrderedDict()  # key -> (expires_at, value), least recently used first
+
+def _catalog_get(key: tuple):
+    entry = _catalog_cache.get(key)
+    if entry is None:
+        return None
+    if entry[0] < time_module.monotonic():
+        _catalog_cache.pop(key, None)
+        return None
+    _catalog_cache.move_to_end(key)
+    return entry[1]
+
+def _catalog_put(key: tuple, value):
+    _catalog_cache[key] = (time_module.monotonic() + CATALOG_CACHE_TTL, value)
+    _catalog_cache.move_to_end(key)
+    while len(_catalog_cache) > CATALOG_CACHE_MAX_ENTRIES:
+        _catalog_cache.popitem(last=False)
+
+def invalidate_catalog_cache():
+    """Drop cached catalog lookups and the symptom index after doctor/specialty data changes"""
+    _catalog_cache.clear()
+    invalidate_symptom_index()
+
+URGENT_KEYWORDS = (
+    'severe chest pain', 'heart attack', 'stroke', 'unconscious',
+    'severe bleeding', 'broken bone', 'high fever', 'difficulty breathing',
+    'poisoning', 'severe injury', 'emergency', 'urgent'
+)
+
+MEDIUM_KEYWORDS = (
+    'chest pain', 'severe headache', 'high blood pressure',
+    'persistent fever', 'severe pain', 'kidney stone'
+)
+
+# Punctuation becomes whitespace so "chest-pain," still matches "chest pain"
+_PUNCTUATION_TO_SPACE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+
+def normalize_symptoms(symptoms: str) -> str:
+    """Lowercase symptoms and strip punctuation once for all keyword matching"""
+    return symptoms.lower().translate(_PUNCTUATION_TO_SPACE)
+
+def _keyword_scanner(keywords) -> "re.Pattern":
+    # Lookahead alternation reports every (possibly overlapping) keyword in one pass
+    alternation = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+    return re.compile(f"(?=({alternation}))")
+
+_URGENT_RE = _keyword_scanner(URGENT_KEYWORDS)
+_MEDIUM_RE = _keyword_scanner(MEDIUM_KEYWORDS)
+
+def _scan_keywords(pattern: "re.Pattern", keywords: tuple, text: str) -> List[str]:
+    """Return matched keywords in declaration order"""
+    hits = set(pattern.findall(text))
+    return [keyword for keyword in keywords if keyword in hits] if hits else []
+
+SPECIALTY_SEARCH_LIMIT = 20
+
+# Columns returned by _doctor_to_dict, for read paths that don't need ORM objects
+DOCTOR_COLUMNS = (
+    Doctor.id, Doctor.name, Doctor.specialty, Doctor.phone,
+    Doctor.email, Doctor.created_at, Doctor.updated_at
+)
+
 class RAGService:
     def __init__(self, db: Session):
         self.db = db
+        self._db_key = str(db.get_bind().url) if db is not None else None
+    
+    invalidate = staticmethod(invalidate_catalog_cache)
     
     def search_doctors_by_specialty(self, specialty: str) -> List[Dict]:
         """Find doctors by specialty name"""
-        doctors = self.db.query(Doctor).filter(
-            Doctor.specialty.ilike(f"%{specialty}%")
-        ).all()
+        specialty_lower = specialty.lower()
+        cache_key = ('specialty_doctors', self._db_key, specialty_lower)
+        cached = _catalog_get(cache_key)
+        if cached is None:
+            rows = []
+            if specialty_lower:
+                # Prefix match as a range on lower(specialty) so the expression index is used
+                prefix_end = specialty_lower[:-1] + chr(ord(specialty_lower[-1]) + 1)
+                rows = self.db.query(*DOCTOR_COLUMNS).filter(
+                    func.lower(Doctor.specialty) >= specialty_lower,
+                    func.lower(Doctor.specialty) < prefix_end
+                ).order_by(Doctor.id).limit(SPECIALTY_SEARCH_LIMIT).all()
+            
+            if not rows:
+                # Fall back to a substring match (e.g. "ology")
+                rows = self.db.query(*DOCTOR_COLUMNS).filter(
+                    Doctor.specialty.ilike(f"%{specialty}%")
+                ).order_by(Doctor.id).limit(SPECIALTY_SEARCH_LIMIT).all()
+            
+            cached = [dict(row._mapping) for row in rows]
+            _catalog_put(cache_key, cached)
         
-        return [self._doctor_to_dict(doctor) for doctor in doctors]
+        return [dict(doctor) for doctor in cached]
     
     def search_doctors_by_symptoms(self, symptoms: str) -> List[Dict]:
         """Find appropriate doctors based on symptoms"""
-        symptoms_lower = symptoms.lower()
+        sorted_specialties = self._ranked_specialties(normalize_symptoms(symptoms))
+        
+        return self._recommend(sorted_specialties)[1]
+    
+    def assess_and_recommend(self, symptoms: str) -> Dict:
+        """Urgency, top specialties with instructions and matching doctors for one set of symptoms"""
+        normalized = normalize_symptoms(symptoms)
+        sorted_specialties = self._ranked_specialties(normalized)
+        
+        specialties, doctors = self._recommend(sorted_specialties, with_instructions=True)
+        
+        return {
+            'urgency': self._urgency_check(normalized),
+            'specialties': specialties,
+            'doctors': doctors
+        }
+    
+    def _ranked_specialties(self, normalized: str) -> tuple:
+        cache_key = ('symptom_scores', self._db_key, normalized)
+        sorted_specialties = _catalog_get(cache_key)
+        if sorted_specialties is None:
+            sorted_specialties = self._score_specialties(normalized)
+            _catalog_put(cache_key, sorted_specialties)
+        return sorted_specialties
+    
+    def _recommend(self, sorted_specialties: tuple, with_instructions: bool = False) -> tuple:
+        """Load top specialties and their doctors in one joined query (plus one IN load for instructions)"""
+        if not sorted_specialties:
+            return [], []
+        
+        top_ids = [specialty_id for specialty_id, _ in sorted_specialties]
+        query = self.db.query(Specialty, Doctor).outerjoin(
+            Doctor, Doctor.specialty == Specialty.name
+        ).filter(
+            Specialty.id.in_(top_ids)
+        ).order_by(Doctor.id)
+        if with_instructions:
+            query = query.options(selectinload(Specialty.pre_visit_instructions_rel))
         
-        # Get all symptom mappings
-        symptom_mappings = self.db.query(SymptomMapping).all()
+        specialty_by_id = {}
+        doctors_by_specialty = {}
+        for specialty, doctor in query.all():
+            specialty_by_id[specialty.id] = specialty
+            if doctor is not None:
+                doctors_by_specialty.setdefault(specialty.id, []).append(doctor)
         
+        specialties = []
+        recommended_doctors = []
+        for specialty_id, score in sorted_specialties:
+            specialty = specialty_by_id.get(specialty_id)
+            if specialty is None:
+                continue
+            
+            specialty_doctors = doctors_by_specialty.get(specialty_id, [])
+            for doctor in specialty_doctors:
+                doctor_dict = self._doctor_to_dict(doctor)
+                doctor_dict['match_score'] = score
+                doctor_dict['specialty_info'] = {
+                    'name': specialty.name,
+                    'description': specialty.description,
+                    'instructions': specialty.pre_visit_instructions
+                }
+                recommended_doctors.append(doctor_dict)
+            
+            if with_instructions:
+                specialties.append({
+                    'id': specialty.id,
+                    'name': specialty.name,
+                    'description': specialty.description,
+                    'pre_visit_instructions': specialty.pre_visit_instructions,
+                    'match_score': score,
+                    'doctor_ids': [doctor.id for doctor in specialty_doctors],
+                    'instructions': {
+                        'specialty': specialty.name,
+                        'description': specialty.description,
+                        'general_instructions': specialty.pre_visit_instructions,
+                        'detailed_instructions': [
+                            {'text': instruction.instruction_text, 'type': instruction.instruction_type}
+                            for instruction in specialty.pre_visit_instructions_rel
+                        ]
+                    }
+                })
+        
+        return specialties, recommended_doctors
+    
+    def _score_specialties(self, symptoms_lower: str) -> tuple:
+        """Rank specialties by matched symptom keywords, top 3 as (specialty_id, score)"""
+        if _has_keyword_table(self.db):
+            rows = self.db.execute(SCORE_SPECIALTIES_SQL, {"symptoms": symptoms_lower})
+            return tuple((specialty_id, score) for specialty_id, score in rows)
+        
+        # Databases without a populated symptom_keywords table
         specialty_scores = {}
         
-        for mapping in symptom_mappings:
-            keywords = json.loads(mapping.symptom_keywords)
+        for specialty_id, keywords, priority in _load_symptom_index(self.db):
             score = 0
             
             for keyword in keywords:
-                if keyword.lower() in symptoms_lower:
-                    score += mapping.priority
+                if keyword in symptoms_lower:
+                    score += priority
             
             if score > 0:
-                if mapping.specialty_id not in specialty_scores:
-                    specialty_scores[mapping.specialty_id] = 0
-                specialty_scores[mapping.specialty_id] += score
+                if specialty_id not in specialty_scores:
+                    specialty_scores[specialty_id] = 0
+                specialty_scores[specialty_id] += score
         
         # Get top specialties
-        sorted_specialties = sorted(
+        return tuple(sorted(
             specialty_scores.items(), 
             key=lambda x: x[1], 
             reverse=True
-        )[:3]
-        
-        # Find doctors for top specialties
-        recommended_doctors = []
-        for specialty_id, score in sorted_specialties:
-            specialty = self.db.query(Specialty).filter(
-                Specialty.id == specialty_id
-            ).first()
-            
-            if specialty:
-                doctors = self.db.query(Doctor).filter(
-                    Doctor.specialty == specialty.name
-                ).all()
-                
-                for doctor in doctors:
-                    doctor_dict = self._doctor_to_dict(doctor)
-                    doctor_dict['match_score'] = score
-                    doctor_dict['specialty_info'] = {
-                        'name': specialty.name,
-                        'description': specialty.description,
-                        'instructions': specialty.pre_visit_instructions
-                    }
-                    recommended_doctors.append(doctor_dict)
-        
-        return recommended_doctors
+        )[:3])
     
     def get_doctor_availability(self, doctor_id: int, start_date: date = None, days: int = 7) -> List[Dict]:
         """Get available slots for a doctor"""
@@ -77,71 +277,134 @@ class RAGService:
         
         end_date = start_date + timedelta(days=days)
         
-        # Get doctor's schedule
-        doctor = self.db.query(Doctor).filter(Doctor.id == doctor_id).first()
+        # Get doctor with schedules in one round trip
+        doctor = self.db.query(Doctor).options(
+            selectinload(Doctor.schedules)
+        ).filter(Doctor.id == doctor_id).first()
         if not doctor:
             return []
         
-        schedules = self.db.query(Doctor).filter(Doctor.id == doctor_id).first().schedules
+        # Prefetch booked and blocked slots for the whole window
+        booked = {
+            (appointment_date, appointment_time)
+            for appointment_date, appointment_time in self.db.query(
+                Appointment.appointment_date, Appointment.appointment_time
+            ).filter(
+                Appointment.doctor_id == doctor_id,
+                Appointment.appointment_date.between(start_date, end_date),
+                Appointment.status == "scheduled"
+            )
+        }
+        blocked = {
+            (slot_date, slot_time)
+            for slot_date, slot_time in self.db.query(
+                TimeSlot.slot_date, TimeSlot.slot_time
+            ).filter(
+                TimeSlot.doctor_id == doctor_id,
+                TimeSlot.slot_date.between(start_date, end_date),
+                TimeSlot.is_blocked == True
+            )
+        }
+        
+        return self._available_slots(doctor, start_date, end_date, booked | blocked)
+    
+    def get_all_doctors_availability(self, start_date: date = None, days: int = 7) -> List[Dict]:
+        """Get available slots for every doctor, batching the lookups instead of one call per doctor"""
+        if start_date is None:
+            start_date = date.today()
+        
+        end_date = start_date + timedelta(days=days)
+        
+        doctors = self.db.query(Doctor).options(
+            selectinload(Doctor.schedules)
+        ).order_by(Doctor.id).all()
+        
+        # Booked and blocked slots for all doctors over the whole window
+        taken = {doctor.id: set() for doctor in doctors}
+        booked_rows = self.db.query(
+            Appointment.doctor_id, Appointment.appointment_date, Appointment.appointment_time
+        ).filter(
+            Appointment.appointment_date.between(start_date, end_date),
+            Appointment.status == "scheduled"
+        )
+        blocked_rows = self.db.query(
+            TimeSlot.doctor_id, TimeSlot.slot_date, TimeSlot.slot_time
+        ).filter(
+            TimeSlot.slot_date.between(start_date, end_date),
+            TimeSlot.is_blocked == True
+        )
+        for rows in (booked_rows, blocked_rows):
+            for doctor_id, slot_date, slot_time in rows:
+                if doctor_id in taken:
+                    taken[doctor_id].add((slot_date, slot_time))
+        
+        return [
+            {
+                'id': doctor.id,
+                'name': doctor.name,
+                'specialty': doctor.specialty,
+                'phone': doctor.phone,
+                'email': doctor.email,
+                'available_slots': self._available_slots(doctor, start_date, end_date, taken[doctor.id])
+            }
+            for doctor in doctors
+        ]
+    
+    def _available_slots(self, doctor: Doctor, start_date: date, end_date: date, taken: set) -> List[Dict]:
+        """Open slots for a doctor between start_date and end_date, skipping (date, time) pairs in taken"""
+        # Slot times per weekday (Sunday=0), computed once per schedule rather than per day
+        slots_by_day = {}
+        for schedule in doctor.schedules:
+            if schedule.is_active and schedule.day_of_week not in slots_by_day:
+                slots_by_day[schedule.day_of_week] = self._schedule_slot_times(schedule)
         
         available_slots = []
         current_date = start_date
         
         while current_date <= end_date:
-            day_of_week = current_date.weekday()
             # Convert Python weekday (Monday=0) to our format (Sunday=0)
-            day_of_week = (day_of_week + 1) % 7
-            
-            # Find schedule for this day
-            day_schedule = None
-            for schedule in schedules:
-                if schedule.day_of_week == day_of_week and schedule.is_active:
-                    day_schedule = schedule
-                    break
+            day_slots = slots_by_day.get((current_date.weekday() + 1) % 7)
             
-            if day_schedule:
-                # Generate time slots
-                current_time = datetime.combine(current_date, day_schedule.start_time)
-                end_time = datetime.combine(current_date, day_schedule.end_time)
-                
-                while current_time < end_time:
-                    slot_time = current_time.time()
-                    
-                    # Check if slot is available
-                    existing_appointment = self.db.query(Appointment).filter(
-                        Appointment.doctor_id == doctor_id,
-                        Appointment.appointment_date == current_date,
-                        Appointment.appointment_time == slot_time,
-                        Appointment.status == "scheduled"
-                    ).first()
-                    
-                    # Check if slot is blocked
-                    blocked_slot = self.db.query(TimeSlot).filter(
-                        TimeSlot.doctor_id == doctor_id,
-                        TimeSlot.slot_date == current_date,
-                        TimeSlot.slot_time == slot_time,
-                        TimeSlot.is_blocked == True
-                    ).first()
-                    
-                    if not existing_appointment and not blocked_slot:
+            if day_slots:
+                date_str = current_date.isoformat()
+                for slot_time, time_label, time_iso in day_slots:
+                    if (current_date, slot_time) not in taken:
                         available_slots.append({
-                            'date': current_date.isoformat(),
-                            'time': slot_time.strftime('%H:%M'),
-                            'datetime': current_time.isoformat(),
-                            'doctor_id': doctor_id,
+                            'date': date_str,
+                            'time': time_label,
+                            'datetime': f"{date_str}T{time_iso}",
+                            'doctor_id': doctor.id,
                             'doctor_name': doctor.name,
                             'specialty': doctor.specialty
                         })
-                    
-                    # Move to next 30-minute slot
-                    current_time += timedelta(minutes=30)
             
             current_date += timedelta(days=1)
         
         return available_slots
     
+    @staticmethod
+    def _schedule_slot_times(schedule) -> List[tuple]:
+        """30-minute slots in [start_time, end_time) as (time, 'HH:MM', iso time)"""
+        start = schedule.start_time.hour * 3600 + schedule.start_time.minute * 60 + schedule.start_time.second
+        end = schedule.end_time.hour * 3600 + schedule.end_time.minute * 60 + schedule.end_time.second
+        
+        slots = []
+        for offset in range(start, end, 30 * 60):
+            slot_time = time(offset // 3600, offset // 60 % 60, offset % 60)
+            slots.append((slot_time, slot_time.strftime('%H:%M'), slot_time.isoformat()))
+        return slots
+    
     def get_specialty_instructions(self, specialty_name: str) -> Dict:
         """Get pre-visit instructions for a specialty"""
+        cache_key = ('specialty_instructions', self._db_key, specialty_name.lower())
+        cached = _catalog_get(cache_key)
+        if cached is None:
+            cached = self._load_specialty_instructions(specialty_name)
+            _catalog_put(cache_key, cached)
+        
+        return copy.deepcopy(cached)
+    
+    def _load_specialty_instructions(self, specialty_name: str) -> Dict:
         specialty = self.db.query(Specialty).filter(
             Specialty.name.ilike(f"%{specialty_name}%")
         ).first()
@@ -172,61 +435,55 @@ class RAGService:
         """Get patient's appointment history"""
         from models.database import Patient
         
-        patient = self.db.query(Patient).filter(
+        # Only the columns the history entries need, patient and doctor joined in
+        rows = self.db.query(
+            Appointment.id,
+            Appointment.appointment_date,
+            Appointment.appointment_time,
+            Appointment.symptoms,
+            Appointment.status,
+            Appointment.serial_number,
+            Appointment.notes,
+            Doctor.name,
+            Doctor.specialty
+        ).join(
+            Patient, Appointment.patient_id == Patient.id
+        ).join(
+            Doctor, Appointment.doctor_id == Doctor.id
+        ).filter(
             Patient.phone == phone_number
-        ).first()
-        
-        if not patient:
-            return []
-        
-        appointments = self.db.query(Appointment).filter(
-            Appointment.patient_id == patient.id
         ).order_by(Appointment.appointment_date.desc()).limit(limit).all()
         
         history = []
-        for appointment in appointments:
+        for row in rows:
             history.append({
-                'appointment_id': appointment.id,
-                'date': appointment.appointment_date.isoformat(),
-                'time': appointment.appointment_time.strftime('%H:%M'),
-                'doctor_name': appointment.doctor.name,
-                'specialty': appointment.doctor.specialty,
-                'symptoms': appointment.symptoms,
-                'status': appointment.status,
-                'serial_number': appointment.serial_number,
-                'notes': appointment.notes
+                'appointment_id': row.id,
+                'date': row.appointment_date.isoformat(),
+                'time': row.appointment_time.strftime('%H:%M'),
+                'doctor_name': row.name,
+                'specialty': row.specialty,
+                'symptoms': row.symptoms,
+                'status': row.status,
+                'serial_number': row.serial_number,
+                'notes': row.notes
             })
         
         return history
     
     def get_urgent_symptoms_check(self, symptoms: str) -> Dict:
         """Check if symptoms indicate urgent care needed"""
-        symptoms_lower = symptoms.lower()
-        
-        urgent_keywords = [
-            'severe chest pain', 'heart attack', 'stroke', 'unconscious',
-            'severe bleeding', 'broken bone', 'high fever', 'difficulty breathing',
-            'poisoning', 'severe injury', 'emergency', 'urgent'
-        ]
-        
-        medium_keywords = [
-            'chest pain', 'severe headache', 'high blood pressure', 
-            'persistent fever', 'severe pain', 'kidney stone'
-        ]
-        
+        return self._urgency_check(normalize_symptoms(symptoms))
+    
+    def _urgency_check(self, symptoms_lower: str) -> Dict:
         urgency_level = 'low'
-        matched_keywords = []
+        matched_keywords = _scan_keywords(_URGENT_RE, URGENT_KEYWORDS, symptoms_lower)
         
-        for keyword in urgent_keywords:
-            if keyword in symptoms_lower:
-                urgency_level = 'high'
-                matched_keywords.append(keyword)
-        
-        if urgency_level != 'high':
-            for keyword in medium_keywords:
-                if keyword in symptoms_lower:
-                    urgency_level = 'medium'
-                    matched_keywords.append(keyword)
+        if matched_keywords:
+            urgency_level = 'high'
+        else:
+            matched_keywords = _scan_keywords(_MEDIUM_RE, MEDIUM_KEYWORDS, symptoms_lower)
+            if matched_keywords:
+                urgency_level = 'medium'
         
         return {
             'urgency_level': urgency_level,
@@ -234,6 +491,23 @@ class RAGService:
             'recommendation': self._get_urgency_recommendation(urgency_level)
         }
     
+    # Async entry points: run the blocking queries in a worker thread so the event loop
+    # keeps serving other requests. Await them one at a time; the session is not shared.
+    async def assess_and_recommend_async(self, symptoms: str) -> Dict:
+        return await asyncio.to_thread(self.assess_and_recommend, symptoms)
+    
+    async def search_doctors_by_symptoms_async(self, symptoms: str) -> List[Dict]:
+        return await asyncio.to_thread(self.search_doctors_by_symptoms, symptoms)
+    
+    async def get_doctor_availability_async(self, doctor_id: int, start_date: date = None, days: int = 7) -> List[Dict]:
+        return await asyncio.to_thread(self.get_doctor_availability, doctor_id, start_date, days)
+    
+    async def get_all_doctors_availability_async(self, start_date: date = None, days: int = 7) -> List[Dict]:
+        return await asyncio.to_thread(self.get_all_doctors_availability, start_date, days)
+    
+    async def search_patient_history_async(self, phone_number: str, limit: int = 10) -> List[Dict]:
+        return await asyncio.to_thread(self.search_patient_history, phone_number, limit)
+    
     def _doctor_to_dict(self, doctor: Doctor) -> Dict:
         """Convert Doctor model to dictionary"""
         return {
@@ -257,15 +531,6 @@ class RAGService:
     
     def generate_serial_number(self) -> str:
         """Generate unique serial number for appointment"""
-        last_appointment = self.db.query(Appointment).order_by(
-            Appointment.id.desc()
-        ).first()
-        
-        if last_appointment:
-            # Extract number from last serial (e.g., XH015 -> 15)
-            last_num = int(last_appointment.serial_number[2:])
-            new_num = last_num + 1
-        else:
-            new_num = 1
+        new_num = next_appointment_serial(self.db)
         
         return f"XH{new_num:03d}"
\ No newline at end of file
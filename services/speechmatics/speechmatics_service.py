@@ -1,11 +1,45 @@
 import os
+import io
+import importlib.util
 import base64
 import json
-import requests
+import time
+import random
 import asyncio
+import httpx
 import websockets
 from typing import Optional, Dict, Any
-import tempfile
+
+# Batch job polling backoff (seconds)
+POLL_INITIAL_DELAY = 0.2
+POLL_MAX_DELAY = 2.0
+POLL_BACKOFF = 1.6
+
+# Audio chunks buffered between the source and the real-time socket
+AUDIO_QUEUE_SIZE = 16
+
+# One pooled client for all batch API calls; HTTP/2 when the h2 package is installed
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+_client: Optional[httpx.AsyncClient] = None
+
+def get_speechmatics_client(api_key: str, base_url: str) -> httpx.AsyncClient:
+    """Return the shared Speechmatics client, creating it on first use"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=_HTTP2_AVAILABLE,
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {api_key}"},
+            timeout=30.0
+        )
+    return _client
+
+async def close_speechmatics_client():
+    """Close the shared Speechmatics client (call on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
 
 class SpeechmaticsService:
     def __init__(self):
@@ -16,18 +50,19 @@ class SpeechmaticsService:
         if not self.api_key:
             print("Warning: SPEECHMATICS_API_KEY not found. Speechmatics features will not work.")
     
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        return get_speechmatics_client(self.api_key, self.base_url)
+    
+    async def aclose(self):
+        """Release pooled Speechmatics connections"""
+        await close_speechmatics_client()
+    
     async def transcribe_audio(self, audio_data: bytes, language: str = "en") -> str:
         """Transcribe audio using Speechmatics batch API"""
         if not self.api_key:
             raise Exception("Speechmatics API key not configured")
         
-        url = f"{self.base_url}/jobs"
-        
-        # Create temporary audio file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            temp_file.write(audio_data)
-            temp_filename = temp_file.name
-        
         try:
             # Prepare the request
             config = {
@@ -40,17 +75,14 @@ class SpeechmaticsService:
                 }
             }
             
+            # Upload straight from memory instead of round-tripping through a temp file
             files = {
-                "data_file": open(temp_filename, "rb"),
+                "data_file": ("audio.wav", io.BytesIO(audio_data), "audio/wav"),
                 "config": (None, json.dumps(config), "application/json")
             }
             
-            headers = {
-                "Authorization": f"Bearer {self.api_key}"
-            }
-            
             # Submit transcription job
-            response = requests.post(url, files=files, headers=headers)
+            response = await self._client.post("/jobs", files=files)
             response.raise_for_status()
             
             job_data = response.json()
@@ -73,36 +105,35 @@ class SpeechmaticsService:
             
         except Exception as e:
             raise Exception(f"Speechmatics transcription failed: {str(e)}")
-        finally:
-            # Clean up temp file
-            if os.path.exists(temp_filename):
-                os.unlink(temp_filename)
     
     async def _poll_job_completion(self, job_id: str, max_wait: int = 60) -> Optional[Dict]:
-        """Poll job status until completion"""
-        url = f"{self.base_url}/jobs/{job_id}"
-        headers = {"Authorization": f"Bearer {self.api_key}"}
+        """Poll job status until completion, backing off from 0.2s to 2s between polls"""
+        client = self._client
+        deadline = time.monotonic() + max_wait
+        delay = POLL_INITIAL_DELAY
         
-        for _ in range(max_wait):
-            response = requests.get(url, headers=headers)
+        while True:
+            response = await client.get(f"/jobs/{job_id}")
             response.raise_for_status()
             
             job_status = response.json()
             
             if job_status["job"]["status"] == "done":
                 # Get transcript
-                transcript_url = f"{self.base_url}/jobs/{job_id}/transcript?format=json-v2"
-                transcript_response = requests.get(transcript_url, headers=headers)
+                transcript_response = await client.get(f"/jobs/{job_id}/transcript", params={"format": "json-v2"})
                 transcript_response.raise_for_status()
                 return transcript_response.json()
             
             elif job_status["job"]["status"] == "rejected":
                 raise Exception(f"Speechmatics job rejected: {job_status.get('job', {}).get('errors', 'Unknown error')}")
             
-            # Wait before polling again
-            await asyncio.sleep(1)
-        
-        raise Exception("Speechmatics job timed out")
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise Exception("Speechmatics job timed out")
+            
+            # Wait before polling again; jitter keeps concurrent jobs from polling in lockstep
+            await asyncio.sleep(min(delay * random.uniform(0.9, 1.1), remaining))
+            delay = min(delay * POLL_BACKOFF, POLL_MAX_DELAY)
     
     async def real_time_transcribe(self, audio_stream_callback, on_transcript_callback, language: str = "en"):
         """Real-time transcription using Speechmatics WebSocket API"""
@@ -130,48 +161,67 @@ class SpeechmaticsService:
             
             async with websockets.connect(
                 f"{self.ws_url}/en",
-                extra_headers=headers
+                extra_headers=headers,
+                max_queue=32,
+                compression=None  # per-message deflate buys nothing on PCM audio
             ) as websocket:
                 
                 # Send start recognition message
                 await websocket.send(json.dumps(config))
                 
-                # Start audio streaming task
-                async def stream_audio():
-                    try:
-                        async for audio_chunk in audio_stream_callback():
-                            if audio_chunk:
-                                # Send binary audio data
-                                await websocket.send(audio_chunk)
-                    except Exception as e:
-                        print(f"Audio streaming error: {e}")
+                # Bounded buffer between the audio source and the socket: a slow network
+                # pauses the producer instead of letting chunks pile up in memory
+                audio_queue = asyncio.Queue(maxsize=AUDIO_QUEUE_SIZE)
+                
+                async def produce_audio():
+                    async for audio_chunk in audio_stream_callback():
+                        if audio_chunk:
+                            await audio_queue.put(audio_chunk)
+                    # End marker only on normal completion; on failure or cancellation the
+                    # sender is cancelled too, and waiting on a full queue here would hang cleanup
+                    await audio_queue.put(None)
+                
+                async def send_audio():
+                    while True:
+                        audio_chunk = await audio_queue.get()
+                        if audio_chunk is None:
+                            break
+                        # Send binary audio data
+                        await websocket.send(audio_chunk)
                 
                 # Start receiving transcripts
                 async def receive_transcripts():
-                    try:
-                        async for message in websocket:
+                    async for message in websocket:
+                        try:
                             data = json.loads(message)
+                        except ValueError as e:
+                            print(f"Transcript receiving error: {e}")
+                            continue
+                        
+                        if data.get("message") == "AddTranscript":
+                            transcript = data.get("transcript", "")
+                            is_final = not data.get("is_partial", True)
                             
-                            if data.get("message") == "AddTranscript":
-                                transcript = data.get("transcript", "")
-                                is_final = not data.get("is_partial", True)
-                                
-                                await on_transcript_callback(transcript, is_final)
-                            
-                            elif data.get("message") == "Error":
-                                raise Exception(f"Speechmatics error: {data.get('reason', 'Unknown error')}")
-                    
-                    except Exception as e:
-                        print(f"Transcript receiving error: {e}")
+                            await on_transcript_callback(transcript, is_final)
+                        
+                        elif data.get("message") == "Error":
+                            raise Exception(f"Speechmatics error: {data.get('reason', 'Unknown error')}")
                 
-                # Run both tasks concurrently
-                await asyncio.gather(
-                    stream_audio(),
-                    receive_transcripts()
-                )
+                # A failure on either side cancels the others
+                tasks = [
+                    asyncio.create_task(produce_audio()),
+                    asyncio.create_task(send_audio()),
+                    asyncio.create_task(receive_transcripts())
+                ]
+                try:
+                    await asyncio.gather(*tasks)
+                finally:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
                 
-        except Exception as e:
-            raise Exception(f"Real-time transcription failed: {str(e)}")
+        except Exception as error:
+            raise Exception(f"Real-time transcription failed: {str(error)}") from error
 
 class EnhancedVoiceService:
     """Enhanced voice service with multiple STT/TTS options"""
@@ -215,6 +265,17 @@ class EnhancedVoiceService:
             # Could add more TTS services here
             return self.elevenlabs.text_to_speech(text, voice_id)
     
+    async def text_to_speech_async(
+        self,
+        text: str,
+        method: str = "elevenlabs",
+        voice_id: Optional[str] = None
+    ) -> bytes:
+        """Non-blocking text_to_speech; multi-sentence responses are synthesized sentence by sentence"""
+        
+        # ElevenLabs is the only TTS service for now, whatever the method
+        return await self.elevenlabs.text_to_speech_batched(text, voice_id)
+    
     async def get_available_methods(self) -> Dict[str, Any]:
         """Get available STT/TTS methods and their status"""
         
@@ -258,7 +319,7 @@ class EnhancedVoiceService:
                 response_text = await text_processor_callback(transcript)
                 
                 # Convert response to speech
-                response_audio = self.text_to_speech(response_text, tts_method)
+                response_audio = await self.text_to_speech_async(response_text, tts_method)
                 
                 # Send back to client
                 await response_callback(response_text, response_audio)
@@ -0,0 +1,62 @@
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Generic, Tuple, TypeVar
+
+T = TypeVar("T")
+
+class ConnectionPool(Generic[T]):
+    """Small async pool of reusable clients, recycled after max_session_duration seconds"""
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[T]],
+        max_size: int = 4,
+        max_session_duration: float = 300
+    ):
+        self._connect = connect
+        self.max_size = max_size
+        self.max_session_duration = max_session_duration
+        self._idle: Deque[Tuple[T, float]] = deque()  # (client, created_at), oldest first
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[T]:
+        """Borrow a fresh client for the duration of the block"""
+        client, created_at = await self._acquire()
+        try:
+            yield client
+        finally:
+            await self._release(client, created_at)
+
+    async def aclose(self):
+        """Close every idle client"""
+        while self._idle:
+            client, _ = self._idle.popleft()
+            await self._close(client)
+
+    async def _acquire(self) -> Tuple[T, float]:
+        while self._idle:
+            client, created_at = self._idle.popleft()
+            if not self._expired(created_at):
+                return client, created_at
+            await self._close(client)
+
+        return await self._connect(), time.monotonic()
+
+    async def _release(self, client: T, created_at: float):
+        if self._expired(created_at) or len(self._idle) >= self.max_size:
+            await self._close(client)
+        else:
+            self._idle.append((client, created_at))
+
+    def _expired(self, created_at: float) -> bool:
+        return time.monotonic() - created_at > self.max_session_duration
+
+    async def _close(self, client: T):
+        close = getattr(client, "aclose", None)
+        if close is None:
+            return
+        try:
+            await close()
+        except Exception as e:
+            print(f"Connection pool close error: {str(e)}")
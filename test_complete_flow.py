@@ -4,12 +4,27 @@ Complete Real-Time Flow Test
 Tests the end-to-end functionality with real-time database operations
 """
 
-import requests
-import time
+import asyncio
+import httpx
 
 API_BASE = "http://localhost:8000/api/v1"
 
-def test_complete_real_time_flow():
+async def _wait_for_appointment(client: httpx.AsyncClient, phone: str, timeout: float = 5.0, interval: float = 0.1):
+    """Poll live appointments until one for phone shows up or timeout elapses"""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        response = await client.get("/scheduler/appointments/live/recent")
+        if response.status_code == 200:
+            data = response.json()
+            ours = [apt for apt in data["appointments"] if apt["patient_phone"] == phone]
+            if ours or loop.time() >= deadline:
+                return data, ours
+        elif loop.time() >= deadline:
+            return None, []
+        await asyncio.sleep(interval)
+
+async def test_complete_real_time_flow():
     """Test complete real-time appointment booking flow"""
     print("=== COMPLETE REAL-TIME FLOW TEST ===")
     print("Testing live database-driven chat and booking system")
@@ -17,65 +32,67 @@ def test_complete_real_time_flow():
     
     test_phone = "+8801234567893"
     
-    # Step 1: User greets the system
-    print("1. User greets the AI assistant")
-    print("   Input: 'Hello, I need medical help'")
-    
-    response1 = requests.post(f"{API_BASE}/chat/message", json={
-        "message": "Hello, I need medical help",
-        "phone_number": test_phone
-    })
-    
-    if response1.status_code == 200:
-        data1 = response1.json()
-        print(f"   AI Response: {data1['response'][:100]}...")
-    
-    time.sleep(1)
-    
-    # Step 2: User describes symptoms
-    print("\n2. User describes symptoms")
-    print("   Input: 'I have chest pain and feel worried'")
-    
-    response2 = requests.post(f"{API_BASE}/chat/message", json={
-        "message": "I have chest pain and feel worried",
-        "phone_number": test_phone
-    })
-    
-    if response2.status_code == 200:
-        data2 = response2.json()
-        print(f"   AI Response: {data2['response'][:150]}...")
-    
-    time.sleep(1)
-    
-    # Step 3: User provides name to complete booking
-    print("\n3. User provides name to complete booking")  
-    print("   Input: 'My name is Alice Johnson'")
-    
-    response3 = requests.post(f"{API_BASE}/chat/message", json={
-        "message": "My name is Alice Johnson",
-        "phone_number": test_phone
-    })
-    
-    if response3.status_code == 200:
-        data3 = response3.json()
-        print(f"   AI Response: {data3['response'][:200]}...")
-    
-    time.sleep(2)
+    async with httpx.AsyncClient(base_url=API_BASE, timeout=60.0) as client:
+        # Step 1: User greets the system
+        print("1. User greets the AI assistant")
+        print("   Input: 'Hello, I need medical help'")
+        
+        response1 = await client.post("/chat/message", json={
+            "message": "Hello, I need medical help",
+            "phone_number": test_phone
+        })
+        
+        if response1.status_code == 200:
+            data1 = response1.json()
+            print(f"   AI Response: {data1['response'][:100]}...")
+        
+        # Step 2: User describes symptoms
+        print("\n2. User describes symptoms")
+        print("   Input: 'I have chest pain and feel worried'")
+        
+        response2 = await client.post("/chat/message", json={
+            "message": "I have chest pain and feel worried",
+            "phone_number": test_phone
+        })
+        
+        if response2.status_code == 200:
+            data2 = response2.json()
+            print(f"   AI Response: {data2['response'][:150]}...")
+        
+        # Step 3: User provides name to complete booking
+        print("\n3. User provides name to complete booking")  
+        print("   Input: 'My name is Alice Johnson'")
+        
+        response3 = await client.post("/chat/message", json={
+            "message": "My name is Alice Johnson",
+            "phone_number": test_phone
+        })
+        
+        if response3.status_code == 200:
+            data3 = response3.json()
+            print(f"   AI Response: {data3['response'][:200]}...")
+        
+        # Steps 4 and 5 are independent: verify the chat booking while booking directly
+        appointment_check, direct_booking = await asyncio.gather(
+            _wait_for_appointment(client, test_phone),
+            client.post("/scheduler/book", json={
+                "patient_name": "Bob Wilson",
+                "patient_phone": "+8801234567894",
+                "symptoms": "Regular health checkup and blood pressure monitoring",
+                "booking_channel": "chat"
+            })
+        )
     
     # Step 4: Check live appointments to verify booking
     print("\n4. Verifying real-time appointment creation")
     
-    appointments_response = requests.get(f"{API_BASE}/scheduler/appointments/live/recent")
+    appointments_data, our_appointments = appointment_check
     
-    if appointments_response.status_code == 200:
-        appointments_data = appointments_response.json()
+    if appointments_data is not None:
         print(f"   Total recent appointments: {appointments_data['total_count']}")
         print(f"   Last updated: {appointments_data['update_time']}")
         
         # Look for our new appointment
-        our_appointments = [apt for apt in appointments_data["appointments"] 
-                          if apt["patient_phone"] == test_phone]
-        
         if our_appointments:
             apt = our_appointments[0]
             print(f"\n   ✅ NEW APPOINTMENT FOUND!")
@@ -97,13 +114,6 @@ def test_complete_real_time_flow():
     # Step 5: Test direct booking API
     print("\n5. Testing direct appointment booking API")
     
-    direct_booking = requests.post(f"{API_BASE}/scheduler/book", json={
-        "patient_name": "Bob Wilson",
-        "patient_phone": "+8801234567894",
-        "symptoms": "Regular health checkup and blood pressure monitoring",
-        "booking_channel": "chat"
-    })
-    
     if direct_booking.status_code == 200:
         booking_data = direct_booking.json()
         if booking_data["success"]:
@@ -127,13 +137,13 @@ def test_complete_real_time_flow():
 if __name__ == "__main__":
     try:
         # Test server connection
-        health_response = requests.get("http://localhost:8000/health")
+        health_response = httpx.get("http://localhost:8000/health")
         if health_response.status_code == 200:
             print("Server is running")
-            test_complete_real_time_flow()
+            asyncio.run(test_complete_real_time_flow())
         else:
             print("Server health check failed")
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("Cannot connect to server. Run: python main.py")
     except Exception as e:
         print(f"Test failed: {e}")
\ No newline at end of file
@@ -7,9 +7,11 @@ Run this script to test all components and ensure everything is working
 import os
 import sys
 import asyncio
+import contextlib
+import contextvars
+import io
 import json
 from datetime import datetime, date
-import sqlite3
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -17,33 +19,60 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from dotenv import load_dotenv
 load_dotenv()
 
+@contextlib.contextmanager
+def db_session():
+    """Session from the app's shared factory, always closed afterwards"""
+    from models.database import SessionLocal
+    
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Output buffer of the test running in the current task (None = print straight through)
+_test_output = contextvars.ContextVar("test_output", default=None)
+
+class _TestOutputRouter(io.TextIOBase):
+    """stdout stand-in that sends each concurrent test's prints to that test's own buffer"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+    
+    def write(self, text):
+        return (_test_output.get() or self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+
+async def run_captured(test):
+    """Await a test with its output buffered; returns (output, result or exception)"""
+    buffer = io.StringIO()
+    _test_output.set(buffer)  # gather runs this in its own task, so the setting stays local to it
+    try:
+        result = await test
+    except Exception as e:
+        result = e
+    return buffer.getvalue(), result
+
 async def test_database_connection():
     """Test database connectivity and data"""
     print("\nTesting Database Connection...")
     
     try:
-        # Test SQLite connection
-        conn = sqlite3.connect('hospital.db')
-        cursor = conn.cursor()
-        
-        # Test basic queries
-        cursor.execute("SELECT COUNT(*) FROM doctors")
-        doctor_count = cursor.fetchone()[0]
+        from sqlalchemy import text
+        
+        # All four counts in one statement on the app's session
+        with db_session() as db:
+            doctor_count, specialty_count, patient_count, appointment_count = db.execute(text(
+                "SELECT (SELECT COUNT(*) FROM doctors), (SELECT COUNT(*) FROM specialties), "
+                "(SELECT COUNT(*) FROM patients), (SELECT COUNT(*) FROM appointments)"
+            )).one()
         print(f"[OK] Database connected - {doctor_count} doctors found")
-        
-        cursor.execute("SELECT COUNT(*) FROM specialties")
-        specialty_count = cursor.fetchone()[0]
         print(f"[OK] Found {specialty_count} specialties")
-        
-        cursor.execute("SELECT COUNT(*) FROM patients")
-        patient_count = cursor.fetchone()[0]
         print(f"[OK] Found {patient_count} patients")
-        
-        cursor.execute("SELECT COUNT(*) FROM appointments")
-        appointment_count = cursor.fetchone()[0]
         print(f"[OK] Found {appointment_count} appointments")
         
-        conn.close()
         return True
         
     except Exception as e:
@@ -55,30 +84,25 @@ async def test_rag_service():
     print("\nTesting RAG Service...")
     
     try:
-        from sqlalchemy.orm import sessionmaker
-        from models.database import engine, Doctor
         from services.rag.rag_service import RAGService
         
-        SessionLocal = sessionmaker(bind=engine)
-        db = SessionLocal()
-        
-        rag_service = RAGService(db)
-        
-        # Test symptom-based doctor search
-        chest_pain_doctors = rag_service.search_doctors_by_symptoms("chest pain")
-        print(f"[OK] Found {len(chest_pain_doctors)} doctors for chest pain")
-        
-        # Test doctor availability
-        if chest_pain_doctors:
-            doctor_id = chest_pain_doctors[0]['id']
-            availability = rag_service.get_doctor_availability(doctor_id, days=7)
-            print(f"[OK] Found {len(availability)} available slots for doctor {doctor_id}")
-        
-        # Test urgency check
-        urgency = rag_service.get_urgent_symptoms_check("severe chest pain")
-        print(f"[OK] Urgency assessment: {urgency['urgency_level']}")
+        with db_session() as db:
+            rag_service = RAGService(db)
+            
+            # Symptom search, then availability, on the same session
+            chest_pain_doctors = await rag_service.search_doctors_by_symptoms_async("chest pain")
+            print(f"[OK] Found {len(chest_pain_doctors)} doctors for chest pain")
+            
+            # Test doctor availability
+            if chest_pain_doctors:
+                doctor_id = chest_pain_doctors[0]['id']
+                availability = rag_service.get_doctor_availability(doctor_id, days=7)
+                print(f"[OK] Found {len(availability)} available slots for doctor {doctor_id}")
+            
+            # Keyword-only check, no database access
+            urgency = rag_service.get_urgent_symptoms_check("severe chest pain")
+            print(f"[OK] Urgency assessment: {urgency['urgency_level']}")
         
-        db.close()
         return True
         
     except Exception as e:
@@ -90,43 +114,38 @@ async def test_scheduler_agent():
     print("\nTesting Scheduler Agent...")
     
     try:
-        from sqlalchemy.orm import sessionmaker
-        from models.database import engine
         from agents.scheduler.scheduler_agent import SchedulerAgent
         from models.schemas import AppointmentBookingRequest, BookingChannel
         
-        SessionLocal = sessionmaker(bind=engine)
-        db = SessionLocal()
-        
-        scheduler = SchedulerAgent(db)
-        
-        # Test appointment booking
-        booking_request = AppointmentBookingRequest(
-            patient_name="Test Patient",
-            patient_phone="+8801999999999",
-            symptoms="Test symptoms for system verification",
-            booking_channel=BookingChannel.CHAT
-        )
-        
-        result = await scheduler.book_appointment(booking_request)
-        
-        if result.success:
-            print(f"[OK] Appointment booked successfully: {result.appointment.serial_number}")
+        with db_session() as db:
+            scheduler = SchedulerAgent(db)
             
-            # Test cancellation
-            cancel_result = await scheduler.cancel_appointment(
-                result.appointment.id, 
-                "System test cancellation"
+            # Test appointment booking
+            booking_request = AppointmentBookingRequest(
+                patient_name="Test Patient",
+                patient_phone="+8801999999999",
+                symptoms="Test symptoms for system verification",
+                booking_channel=BookingChannel.CHAT
             )
             
-            if cancel_result["success"]:
-                print("[OK] Appointment cancellation works")
+            result = await scheduler.book_appointment(booking_request)
+            
+            if result.success:
+                print(f"[OK] Appointment booked successfully: {result.appointment.serial_number}")
+                
+                # Test cancellation
+                cancel_result = await scheduler.cancel_appointment(
+                    result.appointment.id, 
+                    "System test cancellation"
+                )
+                
+                if cancel_result["success"]:
+                    print("[OK] Appointment cancellation works")
+                else:
+                    print(f"[WARNING] Cancellation issue: {cancel_result['message']}")
             else:
-                print(f"[WARNING] Cancellation issue: {cancel_result['message']}")
-        else:
-            print(f"[WARNING] Booking test result: {result.message}")
+                print(f"[WARNING] Booking test result: {result.message}")
         
-        db.close()
         return True
         
     except Exception as e:
@@ -138,26 +157,21 @@ async def test_chat_agent():
     print("\nTesting Chat Agent Structure...")
     
     try:
-        from sqlalchemy.orm import sessionmaker
-        from models.database import engine
         from agents.chat.chat_agent import ChatAgent
         from models.schemas import ChatRequest
         
-        SessionLocal = sessionmaker(bind=engine)
-        db = SessionLocal()
-        
-        chat_agent = ChatAgent(db)
-        
-        # Test chat agent initialization
-        print("[OK] Chat agent initialized successfully")
-        print("[OK] OpenAI service configured")
-        print("[OK] RAG service integrated")
-        print("[OK] Scheduler agent integrated")
-        
-        # Note: We're not making actual API calls to avoid API key requirements in testing
-        print("[INFO] Note: Actual OpenAI API calls require valid API keys")
+        with db_session() as db:
+            chat_agent = ChatAgent(db)
+            
+            # Test chat agent initialization
+            print("[OK] Chat agent initialized successfully")
+            print("[OK] OpenAI service configured")
+            print("[OK] RAG service integrated")
+            print("[OK] Scheduler agent integrated")
+            
+            # Note: We're not making actual API calls to avoid API key requirements in testing
+            print("[INFO] Note: Actual OpenAI API calls require valid API keys")
         
-        db.close()
         return True
         
     except Exception as e:
@@ -169,23 +183,18 @@ async def test_voice_agent():
     print("\nTesting Voice Agent Structure...")
     
     try:
-        from sqlalchemy.orm import sessionmaker
-        from models.database import engine
         from agents.voice.voice_agent import VoiceAgent
         
-        SessionLocal = sessionmaker(bind=engine)
-        db = SessionLocal()
-        
-        voice_agent = VoiceAgent(db)
-        
-        print("[OK] Voice agent initialized successfully")
-        print("[OK] Voice processing service configured")
-        print("[OK] GPT-3.5-turbo service configured")
-        
-        # Note: We're not making actual API calls to avoid API key requirements
-        print("[INFO] Note: Actual ElevenLabs/Whisper API calls require valid API keys")
+        with db_session() as db:
+            voice_agent = VoiceAgent(db)
+            
+            print("[OK] Voice agent initialized successfully")
+            print("[OK] Voice processing service configured")
+            print("[OK] GPT-3.5-turbo service configured")
+            
+            # Note: We're not making actual API calls to avoid API key requirements
+            print("[INFO] Note: Actual ElevenLabs/Whisper API calls require valid API keys")
         
-        db.close()
         return True
         
     except Exception as e:
@@ -223,31 +232,26 @@ def check_environment_variables():
     """Check if required environment variables are set"""
     print("\nChecking Environment Variables...")
     
-    required_vars = [
-        "OPENAI_API_KEY",
-        "ELEVENLABS_API_KEY",
-    ]
-    
-    optional_vars = [
-        "DATABASE_URL",
-        "HOSPITAL_NAME",
-        "HOSPITAL_PHONE",
-        "SERVER_HOST",
-        "SERVER_PORT"
+    # (name, required) pairs, checked against one snapshot of the environment
+    env_vars = [
+        ("OPENAI_API_KEY", True),
+        ("ELEVENLABS_API_KEY", True),
+        ("DATABASE_URL", False),
+        ("HOSPITAL_NAME", False),
+        ("HOSPITAL_PHONE", False),
+        ("SERVER_HOST", False),
+        ("SERVER_PORT", False),
     ]
+    env = os.environ.copy()
     
     missing_required = []
     
-    for var in required_vars:
-        if os.getenv(var):
+    for var, required in env_vars:
+        if env.get(var):
             print(f"[OK] {var}: Set")
-        else:
+        elif required:
             print(f"[MISSING] {var}: Not set (Required for full functionality)")
             missing_required.append(var)
-    
-    for var in optional_vars:
-        if os.getenv(var):
-            print(f"[OK] {var}: Set")
         else:
             print(f"[DEFAULT] {var}: Using default value")
     
@@ -278,21 +282,23 @@ async def run_all_tests():
         print("\n❌ Database test failed. Please run: python scripts/init_db.py")
         return
     
-    # Service tests
-    rag_ok = await test_rag_service()
-    test_results.append(("RAG Service", rag_ok))
-    
-    scheduler_ok = await test_scheduler_agent()
-    test_results.append(("Scheduler Agent", scheduler_ok))
-    
-    chat_ok = await test_chat_agent()
-    test_results.append(("Chat Agent", chat_ok))
-    
-    voice_ok = await test_voice_agent()
-    test_results.append(("Voice Agent", voice_ok))
-    
-    api_ok = await test_api_structure()
-    test_results.append(("API Structure", api_ok))
+    # Service tests are independent once the database is up, so run them together
+    service_tests = [
+        ("RAG Service", test_rag_service()),
+        ("Scheduler Agent", test_scheduler_agent()),
+        ("Chat Agent", test_chat_agent()),
+        ("Voice Agent", test_voice_agent()),
+        ("API Structure", test_api_structure()),
+    ]
+    # Each test's output is buffered and printed in order afterwards, so concurrent prints don't interleave
+    with contextlib.redirect_stdout(_TestOutputRouter(sys.stdout)):
+        outputs = await asyncio.gather(*(run_captured(test) for _, test in service_tests))
+    for (test_name, _), (output, result) in zip(service_tests, outputs):
+        sys.stdout.write(output)
+        if isinstance(result, Exception):
+            print(f"[ERROR] {test_name} test crashed: {result}")
+            result = False
+        test_results.append((test_name, result))
     
     # Summary
     print("\n" + "=" * 60)
@@ -325,7 +331,8 @@ if __name__ == "__main__":
     # Initialize database if it doesn't exist
     if not os.path.exists("hospital.db"):
         print("Database not found. Initializing...")
-        os.system("python scripts/init_db.py")
+        from scripts.init_db import init_database
+        init_database()
     
     # Run tests
     result = asyncio.run(run_all_tests())
@@ -3,182 +3,313 @@
 Test script for the enhanced voice agent
 """
 import asyncio
+import hashlib
+import importlib.util
 import sys
 import os
-from datetime import datetime
+import time
+import httpx
+from typing import Optional
+from types import MappingProxyType
 
 # Add project root to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from agents.voice.emotion_recognition import analyze_emotion_from_voice, VoiceEmotionData
+from agents.voice import emotion_recognition
+from agents.voice.emotion_recognition import (
+    analyze_emotion_from_voice, analyze_emotions_batch, classify_emotion_by_keywords, detect_basic_emotion, VoiceEmotionData
+)
 from agents.voice.voice_prompts import get_hospital_voice_prompt, get_emotional_support_prompts
+from services.elevenlabs.voice_service import ElevenLabsService
+
+# Faster event loop for the async tests when uvloop is installed
+UVLOOP_AVAILABLE = importlib.util.find_spec("uvloop") is not None
+
+# API key presence is read once; the status block is rendered up front
+_DEPS = MappingProxyType({
+    'OpenAI API Key': bool(os.getenv('OPENAI_API_KEY')),
+    'ElevenLabs API Key': bool(os.getenv('ELEVENLABS_API_KEY')),
+})
+_DEPS_BLOCK = "".join(
+    f"  {dep_name}: {'✅ Available' if available else '❌ Missing'}\n" for dep_name, available in _DEPS.items()
+)
+
+# Test fixtures, built once and read-only
+EMOTION_TEST_CASES = (
+    "I'm really worried about my chest pain, it's been hurting all day",
+    "I'm so frustrated, I've been trying to get an appointment for weeks",
+    "Thank you so much, I feel much better now",
+    "I'm not sure what's wrong, I just feel confused about my symptoms",
+    "This pain is unbearable, I need help immediately",
+    "I'm excited to finally get this checked out"
+)
+
+HOSPITAL_INFO = MappingProxyType({
+    'name': 'X Hospital',
+    'phone': '+8801712345000',
+    'address': '123 Medical Street, Dhaka, Bangladesh'
+})
+
+AVAILABLE_DOCTORS = tuple(MappingProxyType(doctor) for doctor in [
+    {
+        'name': 'Dr. Rahman',
+        'specialty': 'Cardiology',
+        'available_days': 'Mon-Thu 6:00 PM - 8:00 PM'
+    },
+    {
+        'name': 'Dr. Ayesha',
+        'specialty': 'Gastroenterology',
+        'available_days': 'Sat-Tue 4:00 PM - 6:00 PM'
+    }
+])
+
+CONVERSATION_HISTORY = tuple(MappingProxyType(message) for message in [
+    {'message_type': 'user', 'message_content': 'Hello, I need to see a doctor'},
+    {'message_type': 'assistant', 'message_content': 'Hello! How can I help you today?'}
+])
+
+FILLER_TEXT = "Let me check that for you..."
+
+# Keyword fast-path expectations: None means the transcript must go on to the model
+KEYWORD_FAST_PATH_CASES = (
+    ("Can you show me what time the clinic opens?", None),
+    ("I want to know what the fee is and how to pay", None),
+    ("I'm sure it's somewhat fine, how do I book?", None),
+    ("My blood pressure readings are good", None),
+    ("I'm worried and scared about these results", 'anxiety'),
+    ("It hurts so much, the pain is constant", 'pain'),
+)
+
+# blake2b digest of the voice prompt built from the fixtures above; update it when the prompt changes on purpose
+GOLDEN_VOICE_PROMPT_DIGEST = "a2a1a86ab375a11102514b47317f5a98"
+
+INTEGRATION_SCENARIOS = tuple(MappingProxyType(scenario) for scenario in [
+    {
+        'name': 'Anxious Patient',
+        'transcript': 'I\'m really worried about this chest pain, should I be concerned?',
+        'expected_emotion': 'anxiety'
+    },
+    {
+        'name': 'Frustrated Patient',
+        'transcript': 'This is so annoying, I can never get through to book an appointment',
+        'expected_emotion': 'frustration'
+    },
+    {
+        'name': 'Pain Patient',
+        'transcript': 'My stomach is really hurting, I need help',
+        'expected_emotion': 'pain'
+    },
+    {
+        'name': 'Confident Patient',
+        'transcript': 'I definitely need to see a cardiologist for my routine checkup',
+        'expected_emotion': 'confidence'
+    }
+])
 
 async def test_emotion_recognition():
     """Test emotion recognition functionality"""
     print("🧠 Testing Emotion Recognition")
     print("=" * 50)
     
-    test_cases = [
-        "I'm really worried about my chest pain, it's been hurting all day",
-        "I'm so frustrated, I've been trying to get an appointment for weeks",
-        "Thank you so much, I feel much better now",
-        "I'm not sure what's wrong, I just feel confused about my symptoms",
-        "This pain is unbearable, I need help immediately",
-        "I'm excited to finally get this checked out"
-    ]
+    # All test cases go to OpenAI in one request; results come back in test-case order
+    try:
+        results = await analyze_emotions_batch(list(EMOTION_TEST_CASES))
+    except Exception as e:
+        results = [e] * len(EMOTION_TEST_CASES)
     
-    for i, transcript in enumerate(test_cases, 1):
-        print(f"\nTest {i}: {transcript[:50]}...")
+    # One write per test case so each block stays together
+    for i, (transcript, analysis) in enumerate(zip(EMOTION_TEST_CASES, results), 1):
+        lines = [f"\nTest {i}: {transcript[:50]}...\n"]
         
-        emotion_data = VoiceEmotionData(
-            transcript=transcript,
-            conversation_history=[]
-        )
+        if isinstance(analysis, Exception):
+            lines.append(f"  ❌ Error: {str(analysis)}\n")
+        else:
+            lines += [
+                f"  Served by: {analysis.source}\n",
+                f"  Primary Emotion: {analysis.primary_emotion}\n",
+                f"  Intensity: {analysis.emotion_intensity:.2f}\n",
+                f"  Confidence: {analysis.confidence:.2f}\n",
+                f"  Recommended Tone: {analysis.recommended_tone}\n",
+                f"  Supportive Response: {analysis.supportive_response[:80]}...\n",
+            ]
         
-        try:
-            analysis = await analyze_emotion_from_voice(emotion_data)
-            
-            print(f"  Primary Emotion: {analysis.primary_emotion}")
-            print(f"  Intensity: {analysis.emotion_intensity:.2f}")
-            print(f"  Confidence: {analysis.confidence:.2f}")
-            print(f"  Recommended Tone: {analysis.recommended_tone}")
-            print(f"  Supportive Response: {analysis.supportive_response[:80]}...")
-            
-        except Exception as e:
-            print(f"  ❌ Error: {str(e)}")
+        sys.stdout.write("".join(lines))
+    
+    # With a local model configured most cases should never reach OpenAI
+    if emotion_recognition.get_local_classifier() is not None:
+        local_share = sum(getattr(analysis, 'source', None) == 'local' for analysis in results) / len(results)
+        print(f"\n  {'✅' if local_share > 0.8 else '❌'} Local fast path served {local_share:.0%} of cases")
+    
+    # A repeated transcript should come straight from the emotion cache
+    lines = ["\nRepeat analyses (cache):\n"]
+    for i, transcript in enumerate(EMOTION_TEST_CASES, 1):
+        start = time.perf_counter()
+        await analyze_emotion_from_voice(VoiceEmotionData(transcript=transcript, conversation_history=[]))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        lines.append(f"  {'✅' if elapsed_ms < 1 else '❌'} Test {i} repeated in {elapsed_ms:.3f}ms\n")
+    sys.stdout.write("".join(lines))
+
+def test_keyword_fast_path():
+    """Test that only clear-cut transcripts are answered by the keyword scanner"""
+    lines = ["\n\n🔎 Testing Keyword Fast Path\n", "=" * 50 + "\n"]
+    for transcript, expected in KEYWORD_FAST_PATH_CASES:
+        analysis = classify_emotion_by_keywords(transcript)
+        detected = analysis.primary_emotion if analysis else None
+        lines.append(f"  {'✅' if detected == expected else '❌'} {transcript[:50]} -> {detected or 'model'}\n")
+    sys.stdout.write("".join(lines))
 
 def test_voice_prompts():
     """Test voice prompt generation"""
-    print("\n\n📝 Testing Voice Prompts")
-    print("=" * 50)
-    
-    # Test hospital info
-    hospital_info = {
-        'name': 'X Hospital',
-        'phone': '+8801712345000',
-        'address': '123 Medical Street, Dhaka, Bangladesh'
-    }
-    
-    # Test doctors data
-    available_doctors = [
-        {
-            'name': 'Dr. Rahman',
-            'specialty': 'Cardiology',
-            'available_days': 'Mon-Thu 6:00 PM - 8:00 PM'
-        },
-        {
-            'name': 'Dr. Ayesha', 
-            'specialty': 'Gastroenterology',
-            'available_days': 'Sat-Tue 4:00 PM - 6:00 PM'
-        }
-    ]
-    
-    # Test conversation history
-    conversation_history = [
-        {'message_type': 'user', 'message_content': 'Hello, I need to see a doctor'},
-        {'message_type': 'assistant', 'message_content': 'Hello! How can I help you today?'}
-    ]
-    
-    print("Generated Voice Prompt:")
     prompt = get_hospital_voice_prompt(
-        conversation_history=conversation_history,
-        hospital_info=hospital_info,
-        available_doctors=available_doctors
+        conversation_history=CONVERSATION_HISTORY,
+        hospital_info=HOSPITAL_INFO,
+        available_doctors=AVAILABLE_DOCTORS
     )
     
-    print(f"  Prompt length: {len(prompt)} characters")
-    print(f"  Contains hospital name: {'✅' if 'X Hospital' in prompt else '❌'}")
-    print(f"  Contains doctor info: {'✅' if 'Dr. Rahman' in prompt else '❌'}")
-    print(f"  Contains conversation history: {'✅' if 'Hello, I need' in prompt else '❌'}")
+    digest = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
     
-    print("\nEmotional Support Prompts:")
+    lines = [
+        "\n\n📝 Testing Voice Prompts\n",
+        "=" * 50 + "\n",
+        "Generated Voice Prompt:\n",
+        f"  Prompt length: {len(prompt)} characters\n",
+    ]
+    if digest == GOLDEN_VOICE_PROMPT_DIGEST:
+        lines.append("  Matches golden prompt: ✅\n")
+    else:
+        # Only a changed prompt needs the individual checks to show what moved
+        lines += [
+            f"  Matches golden prompt: ❌ (digest {digest})\n",
+            f"  Contains hospital name: {'✅' if 'X Hospital' in prompt else '❌'}\n",
+            f"  Contains doctor info: {'✅' if 'Dr. Rahman' in prompt else '❌'}\n",
+            f"  Contains conversation history: {'✅' if 'Hello, I need' in prompt else '❌'}\n",
+        ]
+    lines.append("\nEmotional Support Prompts:\n")
     support_prompts = get_emotional_support_prompts()
     for emotion, prompt in support_prompts.items():
-        print(f"  {emotion}: {prompt[:60]}...")
-
-def test_voice_agent_integration():
-    """Test voice agent integration with mock data"""
-    print("\n\n🤖 Testing Voice Agent Integration")  
-    print("=" * 50)
+        lines.append(f"  {emotion}: {prompt[:60]}...\n")
     
-    # Test cases for different scenarios
-    test_scenarios = [
-        {
-            'name': 'Anxious Patient',
-            'transcript': 'I\'m really worried about this chest pain, should I be concerned?',
-            'expected_emotion': 'anxiety'
-        },
-        {
-            'name': 'Frustrated Patient',
-            'transcript': 'This is so annoying, I can never get through to book an appointment',
-            'expected_emotion': 'frustration'
-        },
-        {
-            'name': 'Pain Patient',
-            'transcript': 'My stomach is really hurting, I need help',
-            'expected_emotion': 'pain'
-        },
-        {
-            'name': 'Confident Patient',
-            'transcript': 'I definitely need to see a cardiologist for my routine checkup',
-            'expected_emotion': 'confidence'
-        }
+    sys.stdout.write("".join(lines))
+
+async def synthesize_filler(tts_service: Optional[ElevenLabsService], text: str) -> bytes:
+    """Filler audio played while the patient's turn is analyzed (empty without a TTS service)"""
+    if tts_service is None:
+        return b""
+    try:
+        return await tts_service.text_to_speech_async(text) or b""
+    except Exception as e:
+        # The filler is best-effort; the real response doesn't depend on it
+        print(f"  ⚠️ Filler TTS failed: {e}")
+        return b""
+
+async def test_voice_agent_integration(use_api: bool = False):
+    """Test voice agent integration: filler TTS and emotion analysis start together on each transcript"""
+    lines = [
+        "\n\n🤖 Testing Voice Agent Integration\n",
+        "=" * 50 + "\n",
+        "Voice Agent Integration Tests:\n",
     ]
     
-    print("Voice Agent Integration Tests:")
-    for scenario in test_scenarios:
-        print(f"\n  Scenario: {scenario['name']}")
-        print(f"  Transcript: {scenario['transcript']}")
-        print(f"  Expected emotion: {scenario['expected_emotion']}")
-        print("  ✅ Ready for integration testing with actual voice agent")
+    # Built once up front so service setup doesn't delay the filler track
+    tts_service = ElevenLabsService() if use_api and _DEPS['ElevenLabs API Key'] else None
+    
+    for scenario in INTEGRATION_SCENARIOS:
+        started = {}
+        
+        async def filler_track():
+            started['filler'] = time.perf_counter()
+            return await synthesize_filler(tts_service, FILLER_TEXT)
+        
+        async def emotion_track():
+            started['emotion'] = time.perf_counter()
+            if use_api:
+                analysis = await analyze_emotion_from_voice(
+                    VoiceEmotionData(transcript=scenario['transcript'], conversation_history=[])
+                )
+                return analysis.primary_emotion
+            return detect_basic_emotion(scenario['transcript'])['emotion']
+        
+        # Both tracks fire as soon as the transcript arrives; the emotion call (the long pole) goes first
+        emotion_task = asyncio.create_task(emotion_track())
+        filler_task = asyncio.create_task(filler_track())
+        filler_audio, detected_emotion = await asyncio.gather(filler_task, emotion_task)
+        start_gap_ms = abs(started['filler'] - started['emotion']) * 1000
+        
+        lines += [
+            f"\n  Scenario: {scenario['name']}\n",
+            f"  Transcript: {scenario['transcript']}\n",
+            f"  Expected emotion: {scenario['expected_emotion']}\n",
+            f"  Detected emotion: {detected_emotion}\n",
+            f"  Filler audio: {len(filler_audio)} bytes\n",
+            f"  {'✅' if start_gap_ms < 10 else '❌'} Filler and emotion analysis started {start_gap_ms:.2f}ms apart\n",
+        ]
+    
+    sys.stdout.write("".join(lines))
 
 def check_dependencies():
     """Check if all required dependencies are available"""
-    print("🔍 Checking Dependencies")
-    print("=" * 50)
-    
-    dependencies = {
-        'OpenAI API Key': os.getenv('OPENAI_API_KEY'),
-        'ElevenLabs API Key': os.getenv('ELEVENLABS_API_KEY'),
-    }
-    
-    all_good = True
-    for dep_name, dep_value in dependencies.items():
-        status = "✅ Available" if dep_value else "❌ Missing"
-        print(f"  {dep_name}: {status}")
-        if not dep_value:
-            all_good = False
+    lines = ["🔍 Checking Dependencies\n", "=" * 50 + "\n", _DEPS_BLOCK]
     
+    all_good = all(_DEPS.values())
     if not all_good:
-        print("\n⚠️  Warning: Some dependencies are missing. Voice features may not work properly.")
-        print("   Please check your .env file and ensure all API keys are set.")
+        lines.append("\n⚠️  Warning: Some dependencies are missing. Voice features may not work properly.\n")
+        lines.append("   Please check your .env file and ensure all API keys are set.\n")
     else:
-        print("\n✅ All dependencies are available!")
+        lines.append("\n✅ All dependencies are available!\n")
     
+    sys.stdout.write("".join(lines))
     return all_good
 
 async def run_tests():
     """Run all voice agent tests"""
     print("🎙️  ENHANCED VOICE AGENT TEST SUITE")
     print("=" * 60)
-    print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"Timestamp: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     print("=" * 60)
     
     # Check dependencies first
     deps_ok = check_dependencies()
     
-    # Run basic tests (don't require API calls)
-    test_voice_prompts()
-    test_voice_agent_integration()
-    
-    # Run emotion recognition tests (requires OpenAI API)
-    if deps_ok and os.getenv('OPENAI_API_KEY'):
-        print("\n⚠️  NOTE: Emotion recognition test requires OpenAI API call")
-        user_input = input("Do you want to run emotion recognition tests? (y/n): ").lower()
-        if user_input == 'y':
-            await test_emotion_recognition()
-    else:
-        print("\n⚠️  Skipping emotion recognition tests (OpenAI API key not available)")
+    # One pooled client (HTTP/2 when h2 is installed) carries every OpenAI call in the run
+    async with httpx.AsyncClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        timeout=10,
+        limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+    ) as client:
+        emotion_recognition.set_client(client)
+        try:
+            # Build the OpenAI client in the background while the run is being set up
+            warm = asyncio.create_task(asyncio.to_thread(emotion_recognition.get_openai_client))
+            
+            # Decide up front whether to run emotion recognition tests (requires OpenAI API);
+            # RUN_EMOTION_TESTS=1/0 answers without prompting, e.g. in CI
+            run_emotion = False
+            if deps_ok and _DEPS['OpenAI API Key']:
+                print("\n⚠️  NOTE: Emotion recognition test requires OpenAI API call")
+                run_emotion_env = os.getenv("RUN_EMOTION_TESTS")
+                if run_emotion_env is not None:
+                    run_emotion = run_emotion_env == "1"
+                elif sys.stdin.isatty():
+                    user_input = await asyncio.to_thread(input, "Do you want to run emotion recognition tests? (y/n): ")
+                    run_emotion = user_input.lower() == 'y'
+            else:
+                print("\n⚠️  Skipping emotion recognition tests (OpenAI API key not available)")
+            
+            await warm
+            
+            # The network-bound emotion batch is launched first; the prompt test (in a thread) and the
+            # integration test overlap with its API round trips. Each test writes its blocks whole.
+            phases = [
+                asyncio.to_thread(test_voice_prompts),
+                asyncio.to_thread(test_keyword_fast_path),
+                # Only calls the OpenAI/ElevenLabs APIs when the emotion tests are enabled
+                test_voice_agent_integration(use_api=run_emotion)
+            ]
+            if run_emotion:
+                phases.insert(0, test_emotion_recognition())
+            await asyncio.gather(*phases)
+        finally:
+            emotion_recognition.set_client(None)
     
     print("\n" + "=" * 60)
     print("✅ TEST SUITE COMPLETED")
@@ -201,4 +332,7 @@ async def run_tests():
     print("  4. Add voice analytics and monitoring")
 
 if __name__ == "__main__":
+    if UVLOOP_AVAILABLE:
+        import uvloop
+        uvloop.install()
     asyncio.run(run_tests())
\ No newline at end of file